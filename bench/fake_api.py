@@ -0,0 +1,181 @@
+"""
+Local stand-in for the Telegram Bot API.
+
+Serves /bot<token>/<method> like api.telegram.org, answers with plausible
+results after a configurable delay and can inject flood-control (429) errors.
+Updates queued with feed() are handed out through getUpdates.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, deque
+from typing import Optional
+
+from aiohttp import web
+
+BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "GirlClubBench", "username": "girl_club_bench_bot"}
+
+# Methods answered with the message they produced; everything else answers True
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendDocument', 'editMessageText', 'editMessageCaption',
+    'editMessageReplyMarkup', 'editMessageMedia',
+}
+
+
+class FakeBotAPI:
+    """
+    Args:
+        latency: Base delay before answering, in seconds
+        jitter: Extra random delay up to this many seconds
+        flood_every: Answer every n-th chat-bound request with 429 (0 disables)
+        retry_after: retry_after sent with injected 429 errors
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, flood_every: int = 0, retry_after: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.floods = Counter()
+        self.served_at = {}
+        self._updates = deque()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._chat_requests = 0
+        self._has_updates = asyncio.Event()
+        self._runner = None
+
+    def feed(self, updates: list[dict]) -> list[int]:
+        """
+        Queue raw updates (without update_id) for getUpdates. Returns the ids assigned.
+        """
+        ids = []
+        for update in updates:
+            update_id = next(self._update_ids)
+            self._updates.append({"update_id": update_id, **update})
+            ids.append(update_id)
+        self._has_updates.set()
+        return ids
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8081) -> str:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(await request.post())
+        self.calls[method] += 1
+
+        if method == 'getUpdates':
+            return self._ok(await self._get_updates(params))
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+        if 'chat_id' in params and self.flood_every:
+            self._chat_requests += 1
+            if self._chat_requests % self.flood_every == 0:
+                self.floods[method] += 1
+                return web.json_response({
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                })
+
+        if method == 'getMe':
+            return self._ok(BOT_USER)
+        if method in MESSAGE_METHODS:
+            return self._ok(self._message(method, params))
+        return self._ok(True)
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        # Updates below the offset were confirmed by the client
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(self._has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        batch = list(itertools.islice(self._updates, limit))
+        now = time.perf_counter()
+        for update in batch:
+            self.served_at.setdefault(update["update_id"], now)
+        return batch
+
+    def _message(self, method: str, params: dict) -> dict:
+        chat_id = int(params.get('chat_id') or 0)
+        message = {
+            "message_id": int(params.get('message_id') or next(self._message_ids)),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if method == 'sendPhoto':
+            message["photo"] = [{"file_id": "bench-photo", "file_unique_id": "bench-photo", "width": 1, "height": 1}]
+            message["caption"] = params.get('caption', '')
+        elif method == 'sendDocument':
+            message["document"] = {"file_id": "bench-document", "file_unique_id": "bench-document"}
+        else:
+            message["text"] = params.get('text', '')
+        if params.get('reply_markup'):
+            message["reply_markup"] = json.loads(params['reply_markup'])
+        return message
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+
+def message_update(user_id: int, text: str, message_id: Optional[int] = None) -> dict:
+    """
+    A private text message from a synthetic user.
+    """
+    user = {"id": user_id, "is_bot": False, "first_name": f"Bench {user_id}"}
+    message = {
+        "message_id": message_id or 1,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": user,
+        "text": text,
+    }
+    if text.startswith('/'):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"message": message}
+
+
+def callback_update(user_id: int, data: str, message_id: int = 1) -> dict:
+    """
+    A button press by a synthetic user on one of the bot's messages.
+    """
+    user = {"id": user_id, "is_bot": False, "first_name": f"Bench {user_id}"}
+    return {"callback_query": {
+        "id": f"{user_id}-{message_id}-{data}",
+        "chat_instance": str(user_id),
+        "from": user,
+        "data": data,
+        "message": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": BOT_USER,
+            "text": "menu",
+        },
+    }}
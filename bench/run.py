@@ -0,0 +1,281 @@
+"""
+End-to-end load test: synthetic updates go through the real dispatcher, routers,
+middlewares and broadcast engine, against a local Postgres and a fake Bot API.
+
+    BENCH_DATABASE_URL=postgresql://localhost/girl_club_bench python -m bench.run --scenario all
+
+BENCH_DATABASE_URL must point at a dedicated database: synthetic users, events and
+broadcasts are written to it. Users get ids from BENCH_USER_BASE up, so repeated
+runs reuse the same rows.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+BENCH_USER_BASE = 9_000_000_000
+BENCH_ADMIN_ID = 1
+
+# (label, kind, weight): a rough mix of what members do in a day
+UPDATE_MIX = [
+    ('/start', 'message', 1),
+    ('/help', 'message', 1),
+    ('/events', 'message', 3),
+    ('/motivation', 'message', 3),
+    ('menu:events', 'callback', 3),
+    ('menu:help', 'callback', 1),
+    ('motivation:quote', 'callback', 4),
+    ('menu:back_to_main', 'callback', 2),
+]
+
+
+def _configure_environment():
+    database_url = os.getenv('BENCH_DATABASE_URL')
+    if not database_url:
+        sys.exit("Set BENCH_DATABASE_URL to a dedicated Postgres database")
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('ADMIN_IDS', str(BENCH_ADMIN_ID))
+    os.environ.setdefault('LOG_PRESET', 'minimal')
+    os.environ.setdefault('DISABLE_FILE_LOGGING', 'true')
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class LatencyTracker:
+    """
+    Outer update middleware timing each update from the moment the fake API handed
+    it out until the dispatcher is done with it, labelled by command or callback data.
+    """
+
+    def __init__(self, served_at: dict, expected: int):
+        self.served_at = served_at
+        self.expected = expected
+        self.latencies = defaultdict(list)
+        self.processed = 0
+        self.done = asyncio.Event()
+
+    async def __call__(self, handler, event, data):
+        try:
+            return await handler(event, data)
+        finally:
+            if event.message and event.message.text:
+                label = event.message.text.split()[0]
+            elif event.callback_query:
+                label = event.callback_query.data
+            else:
+                label = event.event_type
+            started = self.served_at.get(event.update_id, time.perf_counter())
+            self.latencies[label].append(time.perf_counter() - started)
+            self.processed += 1
+            if self.processed >= self.expected:
+                self.done.set()
+
+
+def build_updates(count: int, users: int) -> list[dict]:
+    """
+    Draw `count` updates from UPDATE_MIX, sent by `users` synthetic members.
+    """
+    from bench.fake_api import callback_update, message_update
+
+    labels = [label for label, _, _ in UPDATE_MIX]
+    kinds = {label: kind for label, kind, _ in UPDATE_MIX}
+    weights = [weight for _, _, weight in UPDATE_MIX]
+    updates = []
+    for index, label in enumerate(random.choices(labels, weights, k=count)):
+        user_id = BENCH_USER_BASE + random.randrange(users)
+        if kinds[label] == 'message':
+            updates.append(message_update(user_id, label, message_id=index + 1))
+        else:
+            updates.append(callback_update(user_id, label, message_id=index + 1))
+    return updates
+
+
+def ensure_users(count: int) -> list[int]:
+    """
+    Make sure `count` synthetic members exist and are active.
+    """
+    from psycopg2.extras import execute_values
+
+    from database.postgres import pooled_connection
+
+    user_ids = [BENCH_USER_BASE + index for index in range(count)]
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO users (id, username, first_name, role) VALUES %s
+            ON CONFLICT (id) DO UPDATE SET is_active = TRUE
+        """, [(user_id, f"bench{user_id}", "Bench", 'user') for user_id in user_ids], page_size=1000)
+        conn.commit()
+        cursor.close()
+    return user_ids
+
+
+async def bench_updates(bot, dp, api, args) -> dict:
+    updates = build_updates(args.updates, args.users)
+    tracker = LatencyTracker(api.served_at, len(updates))
+    dp.update.outer_middleware(tracker)
+
+    api.feed(updates)
+    started = time.perf_counter()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, close_bot_session=False,
+                                                   polling_timeout=1))
+    try:
+        await asyncio.wait_for(tracker.done.wait(), args.timeout)
+    except asyncio.TimeoutError:
+        print(f"Timed out with {tracker.processed}/{len(updates)} updates processed")
+    elapsed = time.perf_counter() - started
+    await dp.stop_polling()
+    await polling
+
+    return {'processed': tracker.processed, 'elapsed': elapsed, 'latencies': tracker.latencies}
+
+
+async def bench_broadcast(bot, api, args) -> dict:
+    from broadcast import broadcast_engine
+    from database.users import reconcile_role_index
+
+    recipients = await asyncio.to_thread(ensure_users, args.recipients)
+    await asyncio.to_thread(reconcile_role_index)
+
+    sends_before = api.calls['sendMessage']
+    broadcast_engine.leading = True
+    started = time.perf_counter()
+    broadcast = await broadcast_engine.enqueue(bot, 'broadcast', recipients, "💌 Bench broadcast")
+    await broadcast_engine.join()
+    elapsed = time.perf_counter() - started
+    broadcast_engine.leading = False
+
+    return {'recipients': len(recipients), 'sent': broadcast.sent, 'failed': broadcast.failed,
+            'delivered': api.calls['sendMessage'] - sends_before, 'elapsed': elapsed}
+
+
+async def bench_reminders(bot, api, args) -> dict:
+    from datetime import datetime, timedelta
+
+    from broadcast import broadcast_engine
+    from database.events import add_event_async
+    from database.users import get_all_user_ids_by_role_async
+    from jobs import send_due_reminders
+
+    # Due for the 1h reminder offset, and new on every run so they have not been claimed yet
+    planned_at = (datetime.now() + timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S')
+    for index in range(args.events):
+        await add_event_async(planned_at, f"Bench event {index + 1}", "Bench place")
+    recipients = len(await get_all_user_ids_by_role_async('user'))
+
+    sends_before = api.calls['sendMessage']
+    broadcast_engine.leading = True
+    started = time.perf_counter()
+    await send_due_reminders(bot)
+    queued = time.perf_counter() - started
+    await broadcast_engine.join()
+    elapsed = time.perf_counter() - started
+    broadcast_engine.leading = False
+
+    return {'events': args.events, 'recipients': recipients, 'queued': queued,
+            'delivered': api.calls['sendMessage'] - sends_before, 'elapsed': elapsed}
+
+
+def print_updates_report(result: dict):
+    latencies = result['latencies']
+    print(f"\nUpdates: {result['processed']} in {result['elapsed']:.2f}s "
+          f"({result['processed'] / result['elapsed']:.1f} updates/s)")
+    print(f"{'command':<22}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for label in sorted(latencies):
+        values = latencies[label]
+        print(f"{label:<22}{len(values):>8}{percentile(values, 50) * 1000:>10.1f}{percentile(values, 99) * 1000:>10.1f}")
+    everything = [value for values in latencies.values() for value in values]
+    print(f"{'all':<22}{len(everything):>8}{percentile(everything, 50) * 1000:>10.1f}"
+          f"{percentile(everything, 99) * 1000:>10.1f}")
+
+
+def print_delivery_report(name: str, result: dict):
+    details = ', '.join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                        for key, value in result.items())
+    print(f"\n{name}: {details}")
+    print(f"{name}: {result['delivered'] / result['elapsed']:.1f} messages/s (including 429 retries)")
+
+
+async def run(args):
+    _configure_environment()
+
+    from aiogram import Bot
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from bench.fake_api import FakeBotAPI
+    from database.events import load_event_feed
+    from database.photos import load_photo_catalog
+    from database.postgres import close_pool, init_db, init_pool
+    from database.quotes import load_quote_corpus
+    from database.users import reconcile_role_index
+    from main import create_dispatcher
+    from outbound import OutboundScheduler, ScheduledSession
+
+    api = FakeBotAPI(latency=args.latency, jitter=args.jitter, flood_every=args.flood_every,
+                     retry_after=args.retry_after)
+    base_url = await api.start(port=args.port)
+
+    init_db()
+    init_pool()
+    load_quote_corpus()
+    load_photo_catalog()
+    load_event_feed()
+    reconcile_role_index()
+
+    scheduler_options = {}
+    if args.outbound_rate:
+        scheduler_options['rate'] = args.outbound_rate
+    session = ScheduledSession(scheduler=OutboundScheduler(**scheduler_options),
+                               api=TelegramAPIServer.from_base(base_url))
+    bot = Bot(token="123456:bench", session=session)
+    dp = create_dispatcher()
+
+    try:
+        if args.scenario in ('updates', 'all'):
+            print_updates_report(await bench_updates(bot, dp, api, args))
+        if args.scenario in ('broadcast', 'all'):
+            print_delivery_report("Broadcast", await bench_broadcast(bot, api, args))
+        if args.scenario in ('reminders', 'all'):
+            print_delivery_report("Reminders", await bench_reminders(bot, api, args))
+        print(f"\nBot API calls: {dict(api.calls)}")
+        if api.floods:
+            print(f"Injected 429s: {dict(api.floods)}")
+    finally:
+        await session.close()
+        await api.stop()
+        await asyncio.to_thread(close_pool)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the bot against a local fake Bot API")
+    parser.add_argument('--scenario', choices=['updates', 'broadcast', 'reminders', 'all'], default='all')
+    parser.add_argument('--updates', type=int, default=5000, help="synthetic updates to process")
+    parser.add_argument('--users', type=int, default=500, help="distinct users sending the updates")
+    parser.add_argument('--recipients', type=int, default=2000, help="broadcast recipients")
+    parser.add_argument('--events', type=int, default=3, help="events due for a reminder")
+    parser.add_argument('--latency', type=float, default=0.03, help="fake API delay in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="extra random fake API delay in seconds")
+    parser.add_argument('--flood-every', type=int, default=0, help="answer every n-th chat request with 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="retry_after of injected 429s")
+    parser.add_argument('--outbound-rate', type=float, default=0,
+                        help="override OUTBOUND_RATE (messages/s) to measure past Telegram's limit")
+    parser.add_argument('--port', type=int, default=8081, help="port of the fake API")
+    parser.add_argument('--timeout', type=float, default=600, help="give up waiting for updates after this many seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Registration of the bot's command lists with Telegram, applied once per change
+instead of on every /start.
+"""
+
+import hashlib
+import json
+
+from aiogram import Bot, types
+from aiogram.types import BotCommandScopeChat, BotCommandScopeDefault
+
+from database.commands import delete_command_scope_async, get_command_scopes_async, save_command_scope_async
+from filters import ADMIN_IDS
+from handlers.menu import admin_commands, user_commands
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Scopes applied with Telegram, {scope: content_hash}; mirrors bot_command_scopes
+_applied_scopes = {}
+
+
+def commands_hash(commands: list[types.BotCommand]) -> str:
+    content = json.dumps([(command.command, command.description) for command in commands], ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+async def _apply(bot: Bot, scope: str, commands: list[types.BotCommand], telegram_scope) -> bool:
+    content_hash = commands_hash(commands)
+    if _applied_scopes.get(scope) == content_hash:
+        return False
+    await bot.set_my_commands(commands, scope=telegram_scope)
+    await save_command_scope_async(scope, content_hash)
+    _applied_scopes[scope] = content_hash
+    return True
+
+
+async def sync_bot_commands(bot: Bot) -> int:
+    """
+    Register user commands as the default scope and admin commands for each admin chat,
+    skipping scopes whose stored content hash is unchanged. Scopes of removed admins
+    are deleted. Returns the number of scopes applied.
+    """
+    _applied_scopes.clear()
+    _applied_scopes.update(await get_command_scopes_async())
+
+    applied = 0
+    if await _apply(bot, 'default', user_commands, BotCommandScopeDefault()):
+        applied += 1
+
+    for admin_id in ADMIN_IDS:
+        try:
+            if await _apply(bot, f'chat:{admin_id}', admin_commands, BotCommandScopeChat(chat_id=admin_id)):
+                applied += 1
+        except Exception as e:
+            # Usually the admin has not started the bot yet; retried on their /start
+            logger.warning("Failed to set admin commands for %s: %s", admin_id, e)
+
+    admin_scopes = {f'chat:{admin_id}' for admin_id in ADMIN_IDS}
+    for scope in list(_applied_scopes):
+        if scope.startswith('chat:') and scope not in admin_scopes:
+            try:
+                await bot.delete_my_commands(scope=BotCommandScopeChat(chat_id=int(scope.split(':')[1])))
+            except Exception as e:
+                logger.warning("Failed to remove commands of scope %s: %s", scope, e)
+            await delete_command_scope_async(scope)
+            del _applied_scopes[scope]
+
+    return applied
+
+
+async def ensure_admin_commands(bot: Bot, chat_id: int):
+    """
+    Apply the admin command scope for a chat unless it is already in place.
+    """
+    try:
+        if await _apply(bot, f'chat:{chat_id}', admin_commands, BotCommandScopeChat(chat_id=chat_id)):
+            logger.info("Admin commands set for chat %s", chat_id)
+    except Exception as e:
+        logger.warning("Failed to set admin commands for chat %s: %s", chat_id, e)
@@ -0,0 +1,309 @@
+"""
+Background fan-out of one message to many chats, driven by the durable outbox in
+database/outbox.py. Rate limits and flood control are handled by the bot session
+(see outbound.py); broadcasts send at its lowest priority.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from database.outbox import (
+    create_broadcast_async,
+    finish_broadcast_async,
+    get_broadcast_counts_async,
+    get_pending_recipients_async,
+    get_running_broadcasts_async,
+    record_deliveries_async,
+)
+from database.users import deactivate_users_async
+from logging_config import get_logger
+from metrics import registry
+from outbound import BULK, request_priority
+
+logger = get_logger(__name__)
+
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '10'))
+BROADCAST_PROGRESS_INTERVAL = float(os.getenv('BROADCAST_PROGRESS_INTERVAL', '3'))
+BROADCAST_BATCH_SIZE = int(os.getenv('BROADCAST_BATCH_SIZE', '200'))
+# How often the leader looks for broadcasts queued by other replicas
+BROADCAST_POLL_INTERVAL = float(os.getenv('BROADCAST_POLL_INTERVAL', '2'))
+
+
+class Broadcast:
+    def __init__(self, broadcast_id: int, kind: str, text: str, parse_mode: Optional[str], total: int):
+        self.id = broadcast_id
+        self.kind = kind
+        self.text = text
+        self.parse_mode = parse_mode
+        self.total = total
+        self.sent = 0
+        self.failed = 0
+        self.cancelled = False
+        self.finished = False
+        self.progress_chat_id = None
+        self.progress_message_id = None
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed
+
+
+class BroadcastEngine:
+    """
+    Drains broadcasts stored in the outbox as background tasks with concurrent delivery.
+    Outcomes are recorded per recipient after every batch, so an interrupted broadcast
+    resumes with the recipients not yet served.
+
+    Only the leader replica delivers: between start_leading() and stop_leading() it
+    picks up every running broadcast, including ones queued by other replicas.
+    """
+
+    def __init__(self, concurrency: int = BROADCAST_CONCURRENCY):
+        self.concurrency = concurrency
+        self.leading = False
+        self._active = {}
+        self._tasks = set()
+        self._poll_task = None
+
+    @property
+    def pending_recipients(self) -> int:
+        """
+        Recipients not yet served across the broadcasts this replica is delivering.
+        """
+        return sum(max(0, b.total - b.sent - b.failed) for b in list(self._active.values()))
+
+    def start_leading(self, bot: Bot):
+        self.leading = True
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll(bot))
+
+    def stop_leading(self):
+        """
+        Stop delivering; unfinished broadcasts stay running in the outbox for the next leader.
+        """
+        self.leading = False
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _poll(self, bot: Bot):
+        while self.leading:
+            try:
+                await self.resume(bot)
+            except Exception as e:
+                logger.error("Failed to pick up queued broadcasts: %s", e)
+            await asyncio.sleep(BROADCAST_POLL_INTERVAL)
+
+    async def enqueue(self, bot: Bot, kind: str, user_ids: list[int], text: str, parse_mode: Optional[str] = None,
+                      created_by: Optional[int] = None, progress_chat_id: Optional[int] = None,
+                      progress_message_id: Optional[int] = None) -> Broadcast:
+        """
+        Store a broadcast in the outbox and start sending it in the background, or leave
+        it for the leader when this replica is not leading. When a progress message is
+        given it is edited periodically with the counters and a cancel button.
+        """
+        broadcast_id = await create_broadcast_async(kind, text, parse_mode, user_ids, created_by,
+                                                    progress_chat_id, progress_message_id)
+        broadcast = Broadcast(broadcast_id, kind, text, parse_mode, len(user_ids))
+        broadcast.progress_chat_id = progress_chat_id
+        broadcast.progress_message_id = progress_message_id
+        if self.leading:
+            self._spawn(bot, broadcast)
+        return broadcast
+
+    async def resume(self, bot: Bot) -> int:
+        """
+        Start every running broadcast not being delivered yet: ones interrupted by a
+        restart or queued by another replica. Returns how many were started.
+        """
+        resumed = 0
+        for row in await get_running_broadcasts_async():
+            if row['id'] in self._active:
+                continue
+            counts = await get_broadcast_counts_async(row['id'])
+            # enqueue() may have started it while the counts were loading
+            if row['id'] in self._active:
+                continue
+            broadcast = Broadcast(row['id'], row['kind'], row['text'], row['parse_mode'], row['total'])
+            broadcast.sent = counts.get('sent', 0)
+            broadcast.failed = counts.get('failed', 0) + counts.get('unreachable', 0)
+            broadcast.progress_chat_id = row['progress_chat_id']
+            broadcast.progress_message_id = row['progress_message_id']
+            self._spawn(bot, broadcast)
+            resumed += 1
+        return resumed
+
+    async def join(self):
+        """
+        Wait until the broadcasts this replica is delivering have finished.
+        """
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        """
+        Cancel a broadcast from any replica: the outbox stops returning its recipients.
+        """
+        broadcast = self._active.get(broadcast_id)
+        if broadcast:
+            broadcast.cancelled = True
+        return await finish_broadcast_async(broadcast_id, 'cancelled')
+
+    def _spawn(self, bot: Bot, broadcast: Broadcast):
+        # enqueue() and resume() can both reach the same outbox row; deliver it once
+        if broadcast.id in self._active:
+            return
+        self._active[broadcast.id] = broadcast
+        task = asyncio.create_task(self.run(bot, broadcast))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self, bot: Bot, broadcast: Broadcast) -> Broadcast:
+        """
+        Deliver the pending recipients of a broadcast batch by batch.
+        Started through _spawn(), which registers it as active.
+        """
+        progress_task = None
+        if broadcast.progress_message_id:
+            progress_task = asyncio.create_task(self._report_progress(bot, broadcast))
+
+        try:
+            last_user_id = None
+            while not broadcast.cancelled:
+                batch = await get_pending_recipients_async(broadcast.id, last_user_id, BROADCAST_BATCH_SIZE)
+                if not batch:
+                    break
+                last_user_id = batch[-1]
+                results = await self._deliver_batch(bot, broadcast, batch)
+                await record_deliveries_async(broadcast.id, results)
+                await self._prune_unreachable(results)
+            if not await finish_broadcast_async(broadcast.id, 'cancelled' if broadcast.cancelled else 'done'):
+                # Cancelled through the outbox, possibly from another replica
+                broadcast.cancelled = True
+        except Exception as e:
+            # The broadcast stays 'running' in the outbox and is picked up by the next resume()
+            logger.error("Broadcast %s interrupted: %s", broadcast.id, e)
+            return broadcast
+        finally:
+            self._active.pop(broadcast.id, None)
+            if progress_task:
+                progress_task.cancel()
+
+        broadcast.finished = True
+        if progress_task:
+            await self._edit_progress(bot, broadcast)
+
+        logger.info("Broadcast %s (%s) %s: %s successful, %s failed, total users: %s",
+                    broadcast.id, broadcast.kind, 'cancelled' if broadcast.cancelled else 'completed',
+                    broadcast.sent, broadcast.failed, broadcast.total)
+        return broadcast
+
+    async def _deliver_batch(self, bot: Bot, broadcast: Broadcast, batch: list[int]) -> list[tuple]:
+        recipients = iter(batch)
+        results = []
+
+        async def worker():
+            for user_id in recipients:
+                if broadcast.cancelled:
+                    return
+                results.append(await self._deliver(bot, broadcast, user_id))
+
+        token = request_priority.set(BULK)
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(batch)))))
+        finally:
+            request_priority.reset(token)
+        return results
+
+    async def _deliver(self, bot: Bot, broadcast: Broadcast, user_id: int) -> tuple:
+        """
+        Send to one recipient. Returns (user_id, status, attempts, error) for the outbox.
+        """
+        try:
+            await bot.send_message(user_id, broadcast.text, parse_mode=broadcast.parse_mode)
+            broadcast.sent += 1
+            return user_id, 'sent', 1, None
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            broadcast.failed += 1
+            if is_unreachable(e):
+                logger.debug("User %s is unreachable: %s", user_id, e)
+                return user_id, 'unreachable', 1, str(e)[:200]
+            logger.warning("Failed to send broadcast to user %s: %s", user_id, e,
+                           extra={'event': 'broadcast_failure', 'broadcast_id': broadcast.id})
+            return user_id, 'failed', 1, str(e)[:200]
+        except Exception as e:
+            broadcast.failed += 1
+            logger.warning("Failed to send broadcast to user %s: %s", user_id, e,
+                           extra={'event': 'broadcast_failure', 'broadcast_id': broadcast.id})
+            return user_id, 'failed', 1, str(e)[:200]
+
+    async def _prune_unreachable(self, results: list[tuple]):
+        unreachable = [user_id for user_id, status, _, _ in results if status == 'unreachable']
+        if unreachable:
+            deactivated = await deactivate_users_async(unreachable)
+            logger.info("Deactivated %s users who blocked the bot or deleted their account", deactivated)
+
+    async def _report_progress(self, bot: Bot, broadcast: Broadcast):
+        while not broadcast.finished:
+            await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+            await self._edit_progress(bot, broadcast)
+
+    async def _edit_progress(self, bot: Bot, broadcast: Broadcast):
+        try:
+            await bot.edit_message_text(
+                render_progress(broadcast),
+                chat_id=broadcast.progress_chat_id,
+                message_id=broadcast.progress_message_id,
+                reply_markup=None if broadcast.finished else progress_keyboard(broadcast),
+                parse_mode="HTML"
+            )
+        except TelegramBadRequest as e:
+            # Nothing changed since the previous edit
+            if "message is not modified" not in str(e):
+                logger.warning("Failed to update progress of broadcast %s: %s", broadcast.id, e)
+        except Exception as e:
+            logger.warning("Failed to update progress of broadcast %s: %s", broadcast.id, e)
+
+
+def is_unreachable(error: Exception) -> bool:
+    """
+    Whether a send error means the user blocked the bot or no longer exists.
+    """
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and "chat not found" in str(error).lower()
+
+
+def progress_keyboard(broadcast: Broadcast) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⛔ Остановить рассылку", callback_data=f"broadcast_cancel:{broadcast.id}")]
+    ])
+
+
+def render_progress(broadcast: Broadcast) -> str:
+    if broadcast.finished and broadcast.cancelled:
+        return (f"⛔ <b>Рассылка остановлена</b>\n\n"
+                f"✨ Успели отправить {broadcast.sent} из {broadcast.total} участницам 💕")
+    if broadcast.finished:
+        return (f"💌 <b>Сообщение отправлено!</b>\n\n"
+                f"✨ Дошло до {broadcast.sent} из {broadcast.total} участниц\n\n"
+                f"💕 Спасибо, что заботишься о нашем клубе! 🌸")
+    return (f"📤 <b>Рассылка идет...</b>\n\n"
+            f"✅ Отправлено: {broadcast.sent}\n"
+            f"❌ Не доставлено: {broadcast.failed}\n"
+            f"👥 Всего: {broadcast.total}")
+
+
+broadcast_engine = BroadcastEngine()
+
+registry.gauge('bot_broadcasts_active', 'Broadcasts being delivered by this replica',
+               lambda: len(broadcast_engine._active))
+registry.gauge('bot_broadcast_pending_recipients', 'Recipients still to be served by active broadcasts',
+               lambda: broadcast_engine.pending_recipients)
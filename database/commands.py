@@ -0,0 +1,37 @@
+from database.postgres import awaitable, pooled_connection
+
+
+def get_command_scopes() -> dict:
+    """
+    Get the command scopes applied with Telegram as {scope: content_hash}.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT scope, content_hash FROM bot_command_scopes")
+        scopes = {row['scope']: row['content_hash'] for row in cursor.fetchall()}
+        cursor.close()
+    return scopes
+
+
+def save_command_scope(scope: str, content_hash: str):
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO bot_command_scopes (scope, content_hash) VALUES (%s, %s)
+            ON CONFLICT (scope) DO UPDATE SET content_hash = EXCLUDED.content_hash, applied_at = CURRENT_TIMESTAMP
+        """, (scope, content_hash))
+        conn.commit()
+        cursor.close()
+
+
+def delete_command_scope(scope: str):
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM bot_command_scopes WHERE scope = %s", (scope,))
+        conn.commit()
+        cursor.close()
+
+
+get_command_scopes_async = awaitable(get_command_scopes)
+save_command_scope_async = awaitable(save_command_scope)
+delete_command_scope_async = awaitable(delete_command_scope)
@@ -1,33 +1,160 @@
+import bisect
+import os
 from datetime import datetime
+from typing import Callable
 
-from database.postgres import get_connection
+from database.postgres import awaitable, pooled_connection, run_db
+from database.versions import VersionedCache, bump_content_version
+
+EVENTS_VERSION_CHECK_INTERVAL = float(os.getenv('EVENTS_VERSION_CHECK_INTERVAL', '30'))
+
+
+class EventFeed(VersionedCache):
+    """
+    In-memory list of upcoming events, soonest first, together with the feed rendered
+    from it. The rendering is kept until an event is added or deleted or the next
+    event starts.
+    """
+
+    name = 'events'
+
+    def __init__(self, check_interval: float = EVENTS_VERSION_CHECK_INTERVAL):
+        super().__init__(check_interval)
+        self._events = []
+        self._pages = None
+
+    def _select(self, cursor) -> list:
+        cursor.execute("""
+            SELECT id, planned_at, place, theme FROM events
+            WHERE is_active = true AND planned_at > %s
+            ORDER BY planned_at ASC, id ASC
+        """, (datetime.now(),))
+        return cursor.fetchall()
+
+    def _replace(self, rows: list):
+        self._events = [(row['id'], row['planned_at'], row['place'], row['theme']) for row in rows]
+        self._pages = None
+
+    def add(self, event_id: int, planned_at: datetime, place: str, theme: str, version: int):
+        def apply():
+            if planned_at <= datetime.now():
+                return
+            event = (event_id, planned_at, place, theme)
+            bisect.insort(self._events, event, key=lambda item: (item[1], item[0]))
+            self._pages = None
+
+        self._patch(version, apply)
+
+    def remove(self, event_id: int, version: int):
+        def apply():
+            events = [event for event in self._events if event[0] != event_id]
+            if len(events) != len(self._events):
+                self._events = events
+                self._pages = None
+
+        self._patch(version, apply)
+
+    def _drop_started(self):
+        now = datetime.now()
+        started = 0
+        while started < len(self._events) and self._events[started][1] <= now:
+            started += 1
+        if started:
+            del self._events[:started]
+            self._pages = None
+
+    def upcoming(self) -> list[tuple]:
+        with self._lock:
+            self._drop_started()
+            return list(self._events)
+
+    def pages(self, render: Callable[[list[tuple]], list[str]]) -> list[str]:
+        """
+        Return the feed rendered by `render`, rendering it again only after the events changed.
+        """
+        with self._lock:
+            self._drop_started()
+            if self._pages is None:
+                self._pages = render(list(self._events))
+            return self._pages
+
+
+event_feed = EventFeed()
+
+
+def load_event_feed():
+    event_feed.load()
 
 
 def add_event(planned_at: str, theme: str, place: str) -> int:
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO events (planned_at, theme, place) VALUES (%s, %s, %s) RETURNING id",
-                      (planned_at, theme, place))
-        event_id = cursor.fetchone()['id']
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return event_id
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO events (planned_at, theme, place) VALUES (%s, %s, %s) RETURNING id, planned_at",
+                          (planned_at, theme, place))
+            row = cursor.fetchone()
+            version = bump_content_version(cursor, 'events')
+            conn.commit()
+            cursor.close()
+        event_feed.add(row['id'], row['planned_at'], place, theme, version)
+        return row['id']
     except Exception as exception:
         print(exception)
         return 0
 
 
 def get_all_events() -> list[tuple]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    now = datetime.now()
-    cursor.execute("SELECT id, planned_at, place, theme FROM events WHERE is_active = true AND planned_at > %s ORDER BY planned_at ASC", (now,))
-    events = [(row['id'], row['planned_at'], row['place'], row['theme']) for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return events
+    if not event_feed.is_fresh():
+        event_feed.refresh()
+    return event_feed.upcoming()
+
+
+async def get_event_feed_pages_async(render: Callable[[list[tuple]], list[str]]) -> list[str]:
+    """
+    Serve the rendered events feed from memory, touching the database only when a version check is due.
+    """
+    if not event_feed.is_fresh():
+        await run_db(event_feed.refresh)
+    return event_feed.pages(render)
+
+
+def get_events_page(after_id: int = None, limit: int = 10, backward: bool = False) -> list[tuple]:
+    """
+    Get one page of upcoming events, soonest first, using keyset pagination on (planned_at, id).
+    Returns the page after the `after_id` event, or the page before it when `backward` is set.
+    Returns list of tuples: (id, planned_at, place, theme)
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        now = datetime.now()
+        if after_id is None:
+            cursor.execute("""
+                SELECT id, planned_at, place, theme FROM events
+                WHERE is_active = true AND planned_at > %s
+                ORDER BY planned_at ASC, id ASC
+                LIMIT %s
+            """, (now, limit))
+        elif backward:
+            cursor.execute("""
+                SELECT id, planned_at, place, theme FROM events
+                WHERE is_active = true AND planned_at > %s
+                  AND (planned_at, id) < (SELECT planned_at, id FROM events WHERE id = %s)
+                ORDER BY planned_at DESC, id DESC
+                LIMIT %s
+            """, (now, after_id, limit))
+        else:
+            cursor.execute("""
+                SELECT id, planned_at, place, theme FROM events
+                WHERE is_active = true AND planned_at > %s
+                  AND (planned_at, id) > (SELECT planned_at, id FROM events WHERE id = %s)
+                ORDER BY planned_at ASC, id ASC
+                LIMIT %s
+            """, (now, after_id, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    if backward:
+        rows.reverse()
+    return [(row['id'], row['planned_at'], row['place'], row['theme']) for row in rows]
 
 
 def delete_event(event_id: int) -> bool:
@@ -35,14 +162,85 @@ def delete_event(event_id: int) -> bool:
     Delete an event by its ID.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM events WHERE id = %s", (event_id,))
-        conn.commit()
-        deleted = cursor.rowcount > 0
-        cursor.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM events WHERE id = %s", (event_id,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                version = bump_content_version(cursor, 'events')
+            conn.commit()
+            cursor.close()
+        if deleted:
+            event_feed.remove(event_id, version)
         return deleted
     except Exception as exception:
         print(exception)
         return False
+
+
+def claim_due_reminders(offsets: list[int]) -> list[tuple]:
+    """
+    Atomically claim every reminder that is due: an event gets a reminder `offset` minutes
+    before it starts unless the same or a closer reminder was already claimed. All due
+    offsets of an event are claimed together and the event is returned once, with the
+    closest of them. Claims whose reminder could not be queued are given back with
+    release_reminders().
+    Returns list of tuples: (id, planned_at, place, theme, offset_minutes, claimed_offsets)
+    """
+    if not offsets:
+        return []
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        now = datetime.now()
+        cursor.execute("""
+            WITH due AS (
+                SELECT e.id, o.offset_minutes
+                FROM events e
+                CROSS JOIN unnest(%s::INT[]) AS o(offset_minutes)
+                WHERE e.is_active = true
+                  AND e.planned_at > %s
+                  AND e.planned_at <= %s + make_interval(mins => %s)
+                  AND e.planned_at <= %s + make_interval(mins => o.offset_minutes)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM event_reminders r
+                      WHERE r.event_id = e.id AND r.offset_minutes <= o.offset_minutes
+                  )
+            ), claimed AS (
+                INSERT INTO event_reminders (event_id, offset_minutes)
+                SELECT id, offset_minutes FROM due
+                ON CONFLICT DO NOTHING
+                RETURNING event_id, offset_minutes
+            )
+            SELECT e.id, e.planned_at, e.place, e.theme, MIN(c.offset_minutes) AS offset_minutes,
+                   array_agg(c.offset_minutes) AS claimed_offsets
+            FROM claimed c JOIN events e ON e.id = c.event_id
+            GROUP BY e.id, e.planned_at, e.place, e.theme
+            ORDER BY e.planned_at ASC
+        """, (list(offsets), now, now, max(offsets), now))
+        events = [(row['id'], row['planned_at'], row['place'], row['theme'], row['offset_minutes'],
+                   row['claimed_offsets']) for row in cursor.fetchall()]
+        conn.commit()
+        cursor.close()
+    return events
+
+
+def release_reminders(event_id: int, offsets: list[int]):
+    """
+    Give back reminder claims of an event, so the next tick claims them again.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM event_reminders WHERE event_id = %s AND offset_minutes = ANY(%s::INT[])
+        """, (event_id, list(offsets)))
+        conn.commit()
+        cursor.close()
+
+
+add_event_async = awaitable(add_event)
+get_all_events_async = awaitable(get_all_events)
+get_events_page_async = awaitable(get_events_page)
+delete_event_async = awaitable(delete_event)
+claim_due_reminders_async = awaitable(claim_due_reminders)
+release_reminders_async = awaitable(release_reminders)
+load_event_feed_async = awaitable(load_event_feed)
@@ -0,0 +1,63 @@
+from typing import Optional
+
+from psycopg2.extras import Json, execute_values
+
+from database.postgres import awaitable, pooled_connection
+
+
+def load_fsm_record(key: str) -> Optional[tuple]:
+    """
+    Get the FSM state and data stored for a key.
+    Returns (state, data) or None when there is no record or it has expired.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT state, data FROM fsm_states
+            WHERE key = %s AND expires_at > CURRENT_TIMESTAMP
+        """, (key,))
+        result = cursor.fetchone()
+        cursor.close()
+    if not result:
+        return None
+    return result['state'], result['data']
+
+
+def save_fsm_records(records: list[tuple], deleted_keys: list[str], ttl_seconds: int):
+    """
+    Write a batch of FSM records in one transaction: records is a list of
+    (key, state, data) to upsert, deleted_keys are records that became empty.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        if records:
+            execute_values(cursor, """
+                INSERT INTO fsm_states (key, state, data, expires_at) VALUES %s
+                ON CONFLICT (key) DO UPDATE SET
+                    state = EXCLUDED.state,
+                    data = EXCLUDED.data,
+                    expires_at = EXCLUDED.expires_at
+            """, [(key, state, Json(data), ttl_seconds) for key, state, data in records],
+                template="(%s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))")
+        if deleted_keys:
+            cursor.execute("DELETE FROM fsm_states WHERE key = ANY(%s)", (list(deleted_keys),))
+        conn.commit()
+        cursor.close()
+
+
+def delete_expired_fsm_records() -> int:
+    """
+    Remove abandoned flows. Returns the number of records deleted.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM fsm_states WHERE expires_at <= CURRENT_TIMESTAMP")
+        deleted = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    return deleted
+
+
+load_fsm_record_async = awaitable(load_fsm_record)
+save_fsm_records_async = awaitable(save_fsm_records)
+delete_expired_fsm_records_async = awaitable(delete_expired_fsm_records)
@@ -0,0 +1,220 @@
+"""
+Numbered schema migrations tracked in the schema_version table.
+Append new migrations to MIGRATIONS; never edit one that has shipped.
+"""
+
+# Arbitrary application-wide key for pg_advisory_xact_lock while migrating
+MIGRATION_LOCK_KEY = 0x6769726C636C7562
+
+MIGRATIONS = [
+    (1, "baseline schema", [
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id SERIAL PRIMARY KEY,
+            planned_at TIMESTAMP NOT NULL,
+            theme TEXT NOT NULL,
+            place TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active BOOLEAN DEFAULT TRUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS quotes (
+            id SERIAL PRIMARY KEY,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS photos (
+            id SERIAL PRIMARY KEY,
+            file_id VARCHAR(255) NOT NULL,
+            file_unique_id VARCHAR(255) NOT NULL,
+            filename VARCHAR(255),
+            caption TEXT,
+            uploaded_by BIGINT,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id BIGINT PRIMARY KEY,
+            username VARCHAR(255),
+            first_name VARCHAR(255),
+            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            role VARCHAR(20) DEFAULT 'user'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS anonymous_messages (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            message TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            reply TEXT,
+            replied_by BIGINT,
+            replied_at TIMESTAMP
+        )
+        """,
+        # Databases created before replies were introduced
+        """
+        ALTER TABLE anonymous_messages
+        ADD COLUMN IF NOT EXISTS reply TEXT,
+        ADD COLUMN IF NOT EXISTS replied_by BIGINT,
+        ADD COLUMN IF NOT EXISTS replied_at TIMESTAMP
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_anon_messages_created_at ON anonymous_messages(created_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_anon_messages_user_id ON anonymous_messages(user_id)",
+        """
+        CREATE TABLE IF NOT EXISTS content_versions (
+            name VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS photo_decks (
+            user_id BIGINT PRIMARY KEY,
+            seed BIGINT NOT NULL,
+            deck_cursor INT NOT NULL,
+            deck_size INT NOT NULL,
+            catalog_version BIGINT NOT NULL,
+            last_photo_id INT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, "hot-path indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_events_active_planned_at ON events(is_active, planned_at)",
+        "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+        "CREATE INDEX IF NOT EXISTS idx_quotes_created_at ON quotes(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_photos_uploaded_at ON photos(uploaded_at)",
+    ]),
+    (3, "broadcast outbox", [
+        """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id SERIAL PRIMARY KEY,
+            kind VARCHAR(20) NOT NULL,
+            text TEXT NOT NULL,
+            parse_mode VARCHAR(20),
+            status VARCHAR(20) NOT NULL DEFAULT 'running',
+            total INT NOT NULL DEFAULT 0,
+            created_by BIGINT,
+            progress_chat_id BIGINT,
+            progress_message_id BIGINT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INT NOT NULL REFERENCES broadcasts(id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INT NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at TIMESTAMP,
+            PRIMARY KEY (broadcast_id, user_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_broadcasts_running ON broadcasts(status) WHERE status = 'running'",
+        """
+        CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_pending
+        ON broadcast_recipients(broadcast_id, user_id) WHERE status = 'pending'
+        """,
+    ]),
+    (4, "inactive users", [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE",
+        "DROP INDEX IF EXISTS idx_users_role",
+        "CREATE INDEX IF NOT EXISTS idx_users_active_role ON users(role) WHERE is_active",
+    ]),
+    (5, "event reminder state", [
+        "ALTER TABLE events ADD COLUMN IF NOT EXISTS reminder_sent_at TIMESTAMP",
+    ]),
+    (6, "reminder offsets", [
+        """
+        CREATE TABLE IF NOT EXISTS event_reminders (
+            event_id INT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+            offset_minutes INT NOT NULL,
+            claimed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (event_id, offset_minutes)
+        )
+        """,
+        # Reminders already sent 24 hours ahead by the per-event jobs
+        """
+        INSERT INTO event_reminders (event_id, offset_minutes, claimed_at)
+        SELECT id, 1440, reminder_sent_at FROM events WHERE reminder_sent_at IS NOT NULL
+        ON CONFLICT DO NOTHING
+        """,
+    ]),
+    (7, "fsm storage", [
+        """
+        CREATE TABLE IF NOT EXISTS fsm_states (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data JSONB NOT NULL DEFAULT '{}',
+            expires_at TIMESTAMP NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_fsm_states_expires_at ON fsm_states(expires_at)",
+    ]),
+    (8, "bot command scopes", [
+        """
+        CREATE TABLE IF NOT EXISTS bot_command_scopes (
+            scope VARCHAR(50) PRIMARY KEY,
+            content_hash VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (9, "photo deck appends", [
+        "ALTER TABLE photo_decks ADD COLUMN IF NOT EXISTS shuffled_size INT",
+        "ALTER TABLE photo_decks ADD COLUMN IF NOT EXISTS newest_photo_id INT",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current_version(cursor) -> int:
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+    if not cursor.fetchone()['present']:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    return cursor.fetchone()['version']
+
+
+def run_migrations(conn) -> list[int]:
+    """
+    Apply pending migrations in one transaction and return the versions applied.
+    Warm starts cost a single read; concurrent starters serialize on an advisory
+    lock and re-check the version once they hold it.
+    """
+    cursor = conn.cursor()
+    if _current_version(cursor) >= LATEST_VERSION:
+        conn.rollback()
+        cursor.close()
+        return []
+
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    current = _current_version(cursor)
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                       (version, description))
+        applied.append(version)
+
+    conn.commit()
+    cursor.close()
+    return applied
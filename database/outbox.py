@@ -0,0 +1,117 @@
+from psycopg2.extras import execute_values
+
+from database.postgres import awaitable, pooled_connection
+
+
+def create_broadcast(kind: str, text: str, parse_mode: str, user_ids: list[int], created_by: int = None,
+                     progress_chat_id: int = None, progress_message_id: int = None) -> int:
+    """
+    Store a broadcast job together with one pending row per recipient.
+    Returns the broadcast ID.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO broadcasts (kind, text, parse_mode, total, created_by, progress_chat_id, progress_message_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+        """, (kind, text, parse_mode, len(user_ids), created_by, progress_chat_id, progress_message_id))
+        broadcast_id = cursor.fetchone()['id']
+        execute_values(cursor, """
+            INSERT INTO broadcast_recipients (broadcast_id, user_id) VALUES %s
+            ON CONFLICT DO NOTHING
+        """, [(broadcast_id, user_id) for user_id in user_ids], page_size=1000)
+        conn.commit()
+        cursor.close()
+    return broadcast_id
+
+
+def get_pending_recipients(broadcast_id: int, after_user_id: int = None, limit: int = 200) -> list[int]:
+    """
+    Get the next batch of recipients that have not been served yet, in user ID order.
+    Returns nothing once the broadcast is no longer running, e.g. after it was cancelled.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT r.user_id FROM broadcast_recipients r
+            JOIN broadcasts b ON b.id = r.broadcast_id
+            WHERE r.broadcast_id = %s AND b.status = 'running' AND r.status = 'pending' AND r.user_id > %s
+            ORDER BY r.user_id
+            LIMIT %s
+        """, (broadcast_id, after_user_id if after_user_id is not None else -2 ** 63, limit))
+        user_ids = [row['user_id'] for row in cursor.fetchall()]
+        cursor.close()
+    return user_ids
+
+
+def record_deliveries(broadcast_id: int, results: list[tuple]):
+    """
+    Store delivery outcomes: results is a list of (user_id, status, attempts, error).
+    """
+    if not results:
+        return
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            UPDATE broadcast_recipients AS r
+            SET status = v.status, attempts = r.attempts + v.attempts, error = v.error, updated_at = CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v(broadcast_id, user_id, status, attempts, error)
+            WHERE r.broadcast_id = v.broadcast_id AND r.user_id = v.user_id
+        """, [(broadcast_id, *result) for result in results],
+            template="(%s::INT, %s::BIGINT, %s, %s::INT, %s)", page_size=1000)
+        conn.commit()
+        cursor.close()
+
+
+def get_broadcast_counts(broadcast_id: int) -> dict:
+    """
+    Count recipients per delivery status, e.g. {'sent': 10, 'failed': 1, 'pending': 5}.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT status, COUNT(*) AS count FROM broadcast_recipients
+            WHERE broadcast_id = %s GROUP BY status
+        """, (broadcast_id,))
+        counts = {row['status']: row['count'] for row in cursor.fetchall()}
+        cursor.close()
+    return counts
+
+
+def finish_broadcast(broadcast_id: int, status: str) -> bool:
+    """
+    Mark a running broadcast 'done' or 'cancelled'. Returns False when it had already finished.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE broadcasts SET status = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'running'
+        """, (status, broadcast_id))
+        updated = cursor.rowcount > 0
+        conn.commit()
+        cursor.close()
+    return updated
+
+
+def get_running_broadcasts() -> list[dict]:
+    """
+    Get broadcasts that were interrupted before every recipient was served.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, kind, text, parse_mode, total, progress_chat_id, progress_message_id
+            FROM broadcasts WHERE status = 'running' ORDER BY id
+        """)
+        broadcasts = [dict(row) for row in cursor.fetchall()]
+        cursor.close()
+    return broadcasts
+
+
+create_broadcast_async = awaitable(create_broadcast)
+get_pending_recipients_async = awaitable(get_pending_recipients)
+record_deliveries_async = awaitable(record_deliveries)
+get_broadcast_counts_async = awaitable(get_broadcast_counts)
+finish_broadcast_async = awaitable(finish_broadcast)
+get_running_broadcasts_async = awaitable(get_running_broadcasts)
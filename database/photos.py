@@ -1,4 +1,139 @@
-from database.postgres import get_connection
+import os
+import random
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from math import gcd
+from typing import NamedTuple, Optional
+
+from database.postgres import awaitable, pooled_connection, run_db, run_db_in_background
+from database.versions import VersionedCache, bump_content_version
+
+PHOTOS_VERSION_CHECK_INTERVAL = float(os.getenv('PHOTOS_VERSION_CHECK_INTERVAL', '30'))
+PHOTO_DECK_CACHE_SIZE = int(os.getenv('PHOTO_DECK_CACHE_SIZE', '10000'))
+
+
+class PhotoDeck(NamedTuple):
+    """
+    A user's shuffle-bag over the photo catalog: the first `shuffled_size` catalog
+    entries are dealt in a permutation derived from `seed`, photos added later are
+    appended after them in upload order. `cursor` counts photos already dealt out
+    of `size`; `newest_photo_id` is the newest photo the deck covers.
+    """
+    seed: int
+    cursor: int
+    size: int
+    catalog_version: int
+    last_photo_id: Optional[int]
+    shuffled_size: Optional[int] = None
+    newest_photo_id: Optional[int] = None
+
+
+def deck_position(seed: int, size: int, cursor: int) -> int:
+    """
+    Map the cursor-th card of a deck to a catalog index with an affine permutation
+    (stride coprime with size), so dealing is O(1) without storing the order.
+    """
+    if size <= 1:
+        return 0
+    rng = random.Random(seed)
+    stride = rng.randrange(1, size)
+    while gcd(stride, size) != 1:
+        stride = rng.randrange(1, size)
+    offset = rng.randrange(size)
+    return (stride * cursor + offset) % size
+
+
+class PhotoCatalog(VersionedCache):
+    """
+    In-memory copy of the photos table used to deal photos without querying it.
+    """
+
+    name = 'photos'
+
+    def __init__(self, check_interval: float = PHOTOS_VERSION_CHECK_INTERVAL):
+        super().__init__(check_interval)
+        self._ids = []
+        self._photos = {}
+
+    def _select(self, cursor) -> list:
+        cursor.execute("SELECT id, file_id, file_unique_id, filename, caption, uploaded_at FROM photos ORDER BY id")
+        return cursor.fetchall()
+
+    def _replace(self, rows: list):
+        self._ids = [row['id'] for row in rows]
+        self._photos = {row['id']: dict(row) for row in rows}
+
+    def add(self, photo: dict, version: int):
+        def apply():
+            self._ids.append(photo['id'])
+            self._photos[photo['id']] = photo
+
+        self._patch(version, apply)
+
+    def remove(self, photo_id: int, version: int):
+        def apply():
+            if self._photos.pop(photo_id, None) is not None:
+                self._ids.remove(photo_id)
+
+        self._patch(version, apply)
+
+    def random_photo(self):
+        with self._lock:
+            if not self._ids:
+                return None
+            return self._photos[self._ids[random.randrange(len(self._ids))]]
+
+    def deal(self, deck: Optional[PhotoDeck]) -> tuple:
+        """
+        Deal the next photo from a deck. Photos added since the deck was shuffled are
+        appended to it; a fresh deck is shuffled when the previous one is used up or
+        photos were removed from the catalog. Its first card is never the photo dealt last.
+        Returns (photo, deck) or (None, deck) when there are no photos.
+        """
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return None, deck
+
+            last_photo_id = deck.last_photo_id if deck else None
+            if deck is not None and deck.catalog_version != self._version:
+                deck = self._extend(deck)
+            if deck is None or deck.cursor >= deck.size:
+                seed = random.getrandbits(63)
+                while size > 1 and self._ids[deck_position(seed, size, 0)] == last_photo_id:
+                    seed = random.getrandbits(63)
+                deck = PhotoDeck(seed, 0, size, self._version, last_photo_id, size, self._ids[-1])
+
+            shuffled_size = deck.shuffled_size or deck.size
+            if deck.cursor < shuffled_size:
+                index = deck_position(deck.seed, shuffled_size, deck.cursor)
+            else:
+                index = deck.cursor
+            photo = self._photos[self._ids[index]]
+            return photo, deck._replace(cursor=deck.cursor + 1, last_photo_id=photo['id'])
+
+    def _extend(self, deck: PhotoDeck) -> Optional[PhotoDeck]:
+        """
+        Append the photos added since the deck was last dealt from. Photo ids only grow,
+        so nothing was removed if the deck's photos are still the first `size` entries.
+        Returns None when the deck no longer matches the catalog.
+        """
+        if deck.newest_photo_id is None or bisect_right(self._ids, deck.newest_photo_id) != deck.size:
+            return None
+        return deck._replace(size=len(self._ids), catalog_version=self._version,
+                             shuffled_size=deck.shuffled_size or deck.size, newest_photo_id=self._ids[-1])
+
+
+photo_catalog = PhotoCatalog()
+_decks = OrderedDict()
+# Newest deck of each user waiting to be written; one writer per user drains it
+_unsaved_decks = {}
+_unsaved_decks_lock = threading.Lock()
+
+
+def load_photo_catalog():
+    photo_catalog.load()
 
 
 def add_photo(file_id: str, file_unique_id: str, filename: str = None, caption: str = None, uploaded_by: int = None) -> int:
@@ -6,22 +141,24 @@ def add_photo(file_id: str, file_unique_id: str, filename: str = None, caption:
     Add a photo to the database.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO photos (file_id, file_unique_id, filename, caption, uploaded_by)
-            VALUES (%s, %s, %s, %s, %s) RETURNING id
-        """, (file_id, file_unique_id, filename, caption, uploaded_by))
-        result = cursor.fetchone()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO photos (file_id, file_unique_id, filename, caption, uploaded_by)
+                VALUES (%s, %s, %s, %s, %s) RETURNING id, file_id, file_unique_id, filename, caption, uploaded_at
+            """, (file_id, file_unique_id, filename, caption, uploaded_by))
+            result = cursor.fetchone()
+            if result and 'id' in result:
+                photo_id = result['id']
+            else:
+                # Fallback: get the last inserted ID
+                cursor.execute("SELECT LASTVAL()")
+                photo_id = cursor.fetchone()[0]
+            version = bump_content_version(cursor, 'photos')
+            conn.commit()
+            cursor.close()
         if result and 'id' in result:
-            photo_id = result['id']
-        else:
-            # Fallback: get the last inserted ID
-            cursor.execute("SELECT LASTVAL()")
-            photo_id = cursor.fetchone()[0]
-        conn.commit()
-        cursor.close()
-        conn.close()
+            photo_catalog.add(dict(result), version)
         return photo_id
     except Exception as exception:
         print(exception)
@@ -30,31 +167,124 @@ def add_photo(file_id: str, file_unique_id: str, filename: str = None, caption:
 
 def get_random_photo() -> dict:
     """
-    Get a random photo from the database.
+    Get a random photo from the in-memory catalog.
     Returns dict with photo info or None if no photos.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, file_id, file_unique_id, filename, caption, uploaded_at FROM photos ORDER BY RANDOM() LIMIT 1")
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    if not photo_catalog.is_fresh():
+        photo_catalog.refresh()
+    return photo_catalog.random_photo()
 
-    return dict(result) if result else None
+
+def load_photo_deck(user_id: int) -> Optional[PhotoDeck]:
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT seed, deck_cursor, deck_size, catalog_version, last_photo_id, shuffled_size, newest_photo_id
+            FROM photo_decks WHERE user_id = %s
+        """, (user_id,))
+        result = cursor.fetchone()
+        cursor.close()
+    if not result:
+        return None
+    return PhotoDeck(result['seed'], result['deck_cursor'], result['deck_size'],
+                     result['catalog_version'], result['last_photo_id'],
+                     result['shuffled_size'], result['newest_photo_id'])
 
 
-def get_all_photos() -> list[tuple]:
+def save_photo_deck(user_id: int, deck: PhotoDeck):
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO photo_decks (user_id, seed, deck_cursor, deck_size, catalog_version, last_photo_id,
+                                     shuffled_size, newest_photo_id, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id) DO UPDATE SET
+                seed = EXCLUDED.seed,
+                deck_cursor = EXCLUDED.deck_cursor,
+                deck_size = EXCLUDED.deck_size,
+                catalog_version = EXCLUDED.catalog_version,
+                last_photo_id = EXCLUDED.last_photo_id,
+                shuffled_size = EXCLUDED.shuffled_size,
+                newest_photo_id = EXCLUDED.newest_photo_id,
+                updated_at = EXCLUDED.updated_at
+        """, (user_id, deck.seed, deck.cursor, deck.size, deck.catalog_version, deck.last_photo_id,
+              deck.shuffled_size, deck.newest_photo_id))
+        conn.commit()
+        cursor.close()
+
+
+def _save_unsaved_decks(user_id: int):
+    """
+    Write the user's newest unsaved deck until no newer one is waiting, so decks are
+    stored in the order they were dealt and an older deck never overwrites a newer one.
     """
-    Get all photos with their info.
+    while True:
+        with _unsaved_decks_lock:
+            deck = _unsaved_decks[user_id]
+        try:
+            save_photo_deck(user_id, deck)
+        except Exception:
+            with _unsaved_decks_lock:
+                _unsaved_decks.pop(user_id, None)
+            raise
+        with _unsaved_decks_lock:
+            if _unsaved_decks[user_id] is deck:
+                del _unsaved_decks[user_id]
+                return
+
+
+def _queue_deck_save(user_id: int, deck: PhotoDeck):
+    with _unsaved_decks_lock:
+        writing = user_id in _unsaved_decks
+        _unsaved_decks[user_id] = deck
+    if not writing:
+        run_db_in_background(_save_unsaved_decks, user_id)
+
+
+async def deal_photo_async(user_id: int) -> Optional[dict]:
+    """
+    Deal the next photo from the user's shuffle deck, so every photo is shown once
+    before any repeats. The deck is persisted in the background.
+    Returns dict with photo info or None if no photos.
+    """
+    if not photo_catalog.is_fresh():
+        await run_db(photo_catalog.refresh)
+
+    deck = _decks.get(user_id) or _unsaved_decks.get(user_id)
+    if deck is None:
+        deck = await run_db(load_photo_deck, user_id)
+
+    photo, deck = photo_catalog.deal(deck)
+    if photo is None:
+        return None
+
+    _decks[user_id] = deck
+    _decks.move_to_end(user_id)
+    if len(_decks) > PHOTO_DECK_CACHE_SIZE:
+        _decks.popitem(last=False)
+    _queue_deck_save(user_id, deck)
+    return photo
+
+
+def get_photos_page(after_id: int = None, limit: int = 10, backward: bool = False) -> list[tuple]:
+    """
+    Get one page of photos, newest first, using keyset pagination on id.
+    Returns the page after the `after_id` photo, or the page before it when `backward` is set.
     Returns list of tuples: (id, file_id, filename, caption, uploaded_at)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, file_id, filename, caption, uploaded_at FROM photos ORDER BY uploaded_at DESC")
-    photos = [(row['id'], row['file_id'], row['filename'], row['caption'], row['uploaded_at']) for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return photos
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        if after_id is None:
+            cursor.execute("SELECT id, file_id, filename, caption, uploaded_at FROM photos ORDER BY id DESC LIMIT %s", (limit,))
+        elif backward:
+            cursor.execute("SELECT id, file_id, filename, caption, uploaded_at FROM photos WHERE id > %s ORDER BY id ASC LIMIT %s", (after_id, limit))
+        else:
+            cursor.execute("SELECT id, file_id, filename, caption, uploaded_at FROM photos WHERE id < %s ORDER BY id DESC LIMIT %s", (after_id, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    if backward:
+        rows.reverse()
+    return [(row['id'], row['file_id'], row['filename'], row['caption'], row['uploaded_at']) for row in rows]
 
 
 def delete_photo(photo_id: int) -> bool:
@@ -62,13 +292,16 @@ def delete_photo(photo_id: int) -> bool:
     Delete a photo by its ID.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM photos WHERE id = %s", (photo_id,))
-        conn.commit()
-        deleted = cursor.rowcount > 0
-        cursor.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM photos WHERE id = %s", (photo_id,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                version = bump_content_version(cursor, 'photos')
+            conn.commit()
+            cursor.close()
+        if deleted:
+            photo_catalog.remove(photo_id, version)
         return deleted
     except Exception as exception:
         print(exception)
@@ -79,11 +312,16 @@ def get_photo_by_id(photo_id: int) -> dict:
     """
     Get photo info by ID.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, file_id, file_unique_id, filename, caption, uploaded_at FROM photos WHERE id = %s", (photo_id,))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, file_id, file_unique_id, filename, caption, uploaded_at FROM photos WHERE id = %s", (photo_id,))
+        result = cursor.fetchone()
+        cursor.close()
 
     return dict(result) if result else None
+
+
+add_photo_async = awaitable(add_photo)
+get_photos_page_async = awaitable(get_photos_page)
+delete_photo_async = awaitable(delete_photo)
+get_photo_by_id_async = awaitable(get_photo_by_id)
@@ -1,103 +1,185 @@
+import asyncio
+import functools
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
+from logging_config import get_logger
+from metrics import registry
+
 load_dotenv()
 
-def get_connection():
+logger = get_logger(__name__)
+
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '5'))
+
+_pool = None
+_executor = None
+_pool_lock = threading.Lock()
+
+DB_LATENCY = registry.histogram(
+    'bot_db_call_seconds', 'Time spent running a database function on a worker thread', ('function',)
+)
+
+
+def _connection_kwargs() -> dict:
     database_url = os.getenv('DATABASE_URL')
     if database_url:
-        return psycopg2.connect(database_url, cursor_factory=RealDictCursor)
-    else:
-        # Fallback for local development
-        return psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            database=os.getenv('DB_NAME', 'girl_club_bot'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', ''),
-            cursor_factory=RealDictCursor
-        )
-
-def init_db():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS events (
-            id SERIAL PRIMARY KEY,
-            planned_at TIMESTAMP NOT NULL,
-            theme TEXT NOT NULL,
-            place TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            is_active BOOLEAN DEFAULT TRUE
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS quotes (
-            id SERIAL PRIMARY KEY,
-            text TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS photos (
-            id SERIAL PRIMARY KEY,
-            file_id VARCHAR(255) NOT NULL,
-            file_unique_id VARCHAR(255) NOT NULL,
-            filename VARCHAR(255),
-            caption TEXT,
-            uploaded_by BIGINT,
-            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id BIGINT PRIMARY KEY,
-            username VARCHAR(255),
-            first_name VARCHAR(255),
-            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            role VARCHAR(20) DEFAULT 'user'
-        )
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS anonymous_messages (
-            id SERIAL PRIMARY KEY,
-            user_id BIGINT NOT NULL,
-            message TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            reply TEXT,
-            replied_by BIGINT,
-            replied_at TIMESTAMP
-        )
-    """)
-
-    # Ensure all required columns exist (for migration compatibility)
+        return {'dsn': database_url, 'cursor_factory': RealDictCursor}
+    # Fallback for local development
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'girl_club_bot'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'cursor_factory': RealDictCursor
+    }
+
+
+def get_connection(**options):
+    """
+    Open a dedicated connection outside of the pool; `options` are extra connection parameters.
+    Use for one-off work such as schema setup; queries should use pooled_connection().
+    """
+    return psycopg2.connect(**_connection_kwargs(), **options)
+
+
+def init_pool(minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX) -> ThreadedConnectionPool:
+    """
+    Create the shared connection pool and warm it with `minconn` connections.
+    Database calls made through run_db() are limited to `maxconn` worker threads,
+    so the pool can never be exhausted by the event loop.
+    """
+    global _pool, _executor
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(minconn, maxconn, **_connection_kwargs())
+            _executor = ThreadPoolExecutor(max_workers=maxconn, thread_name_prefix='db')
+    return _pool
+
+
+def close_pool():
+    """
+    Close all pooled connections and stop the database worker threads.
+    Blocks until in-flight database calls finish; from async code run it in a thread.
+    """
+    global _pool, _executor
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the pool and give it back afterwards.
+    Uncommitted work is rolled back if the block raises.
+    """
+    pool = _pool or init_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+
+def ping() -> bool:
+    """
+    Round-trip a trivial query through the pool, for health checks.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+    return True
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking database function on the database worker threads.
+    """
+    if _executor is None:
+        init_pool()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(_timed, func, args, kwargs))
+
+
+def _timed(func, args: tuple, kwargs: dict):
+    started = time.perf_counter()
     try:
-        cursor.execute("""
-            ALTER TABLE anonymous_messages
-            ADD COLUMN IF NOT EXISTS reply TEXT,
-            ADD COLUMN IF NOT EXISTS replied_by BIGINT,
-            ADD COLUMN IF NOT EXISTS replied_at TIMESTAMP
-        """)
-    except Exception as e:
-        print(f"Column addition warning (may already exist): {e}")
-
-    # Add indexes for better performance
+        return func(*args, **kwargs)
+    finally:
+        DB_LATENCY.observe(time.perf_counter() - started, _function_label(func))
+
+
+def _function_label(func) -> str:
+    # e.g. "events.add_event", or "quotes.refresh" for a method of the quote cache
+    name = getattr(func, '__name__', None) or type(func).__name__
+    owner = getattr(func, '__self__', None)
+    if owner is not None:
+        return f"{getattr(owner, 'name', None) or type(owner).__name__}.{name}"
+    module = getattr(func, '__module__', None) or ''
+    return f"{module.rsplit('.', 1)[-1]}.{name}" if module else name
+
+
+_background_tasks = set()
+
+
+def _report_background_failure(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background database write failed: %s", task.exception(), exc_info=task.exception())
+
+
+def run_db_in_background(func, *args, **kwargs) -> asyncio.Task:
+    """
+    Schedule a database function without waiting for it, e.g. for writes off the reply path.
+    """
+    task = asyncio.create_task(run_db(func, *args, **kwargs))
+    _background_tasks.add(task)
+    task.add_done_callback(_report_background_failure)
+    return task
+
+
+def awaitable(func):
+    """
+    Build the awaitable equivalent of a blocking database function.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+
+    wrapper.__name__ = f"{func.__name__}_async"
+    wrapper.__qualname__ = wrapper.__name__
+    return wrapper
+
+
+def init_db() -> list[int]:
+    """
+    Bring the schema up to date by applying pending migrations.
+    Returns the migration versions that were applied (empty on warm starts).
+    """
+    from database.migrations import run_migrations
+
+    conn = get_connection()
     try:
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_anon_messages_created_at ON anonymous_messages(created_at DESC)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_anon_messages_user_id ON anonymous_messages(user_id)
-        """)
-    except Exception as e:
-        print(f"Index creation warning (safe to ignore): {e}")
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+        return run_migrations(conn)
+    finally:
+        conn.close()
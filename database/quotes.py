@@ -1,15 +1,82 @@
-from database.postgres import get_connection
+import os
+import random
+
+from database.postgres import awaitable, pooled_connection, run_db
+from database.versions import VersionedCache, bump_content_version
+
+NO_QUOTES_TEXT = "💕 Цитат пока нет, но скоро появятся вдохновляющие слова! ✨"
+QUOTES_VERSION_CHECK_INTERVAL = float(os.getenv('QUOTES_VERSION_CHECK_INTERVAL', '30'))
+
+
+class QuoteCorpus(VersionedCache):
+    """
+    In-memory copy of the quotes table serving random picks in constant time.
+    """
+
+    name = 'quotes'
+
+    def __init__(self, check_interval: float = QUOTES_VERSION_CHECK_INTERVAL):
+        super().__init__(check_interval)
+        self._ids = []
+        self._texts = []
+        self._positions = {}
+
+    def _select(self, cursor) -> list:
+        cursor.execute("SELECT id, text FROM quotes")
+        return cursor.fetchall()
+
+    def _replace(self, rows: list):
+        self._ids = [row['id'] for row in rows]
+        self._texts = [row['text'] for row in rows]
+        self._positions = {quote_id: index for index, quote_id in enumerate(self._ids)}
+
+    def add(self, quote_id: int, text: str, version: int):
+        def apply():
+            self._positions[quote_id] = len(self._ids)
+            self._ids.append(quote_id)
+            self._texts.append(text)
+
+        self._patch(version, apply)
+
+    def remove(self, quote_id: int, version: int):
+        def apply():
+            index = self._positions.pop(quote_id, None)
+            if index is None:
+                return
+            # Swap the last quote into the freed slot to keep removal O(1)
+            last_id = self._ids.pop()
+            last_text = self._texts.pop()
+            if last_id != quote_id:
+                self._ids[index] = last_id
+                self._texts[index] = last_text
+                self._positions[last_id] = index
+
+        self._patch(version, apply)
+
+    def random_text(self):
+        with self._lock:
+            if not self._texts:
+                return None
+            return self._texts[random.randrange(len(self._texts))]
+
+
+quote_corpus = QuoteCorpus()
+
+
+def load_quote_corpus():
+    quote_corpus.load()
 
 
 def add_quote(text: str) -> int:
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO quotes (text) VALUES (%s) RETURNING id", (text,))
-        quote_id = cursor.fetchone()['id']
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO quotes (text) VALUES (%s) RETURNING id", (text,))
+            quote_id = cursor.fetchone()['id']
+            version = bump_content_version(cursor, 'quotes')
+            conn.commit()
+            cursor.close()
+        quote_corpus.add(quote_id, text, version)
         return quote_id
     except Exception as exception:
         print(exception)
@@ -17,27 +84,51 @@ def add_quote(text: str) -> int:
 
 
 def get_random_quote() -> str:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT text FROM quotes ORDER BY RANDOM() LIMIT 1")
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
-    return result['text'] if result else "💕 Цитат пока нет, но скоро появятся вдохновляющие слова! ✨"
+    if not quote_corpus.is_fresh():
+        quote_corpus.refresh()
+    return quote_corpus.random_text() or NO_QUOTES_TEXT
 
 
-def get_all_quotes() -> list[tuple]:
+async def get_random_quote_async() -> str:
+    """
+    Serve a random quote from memory, touching the database only when a version check is due.
     """
-    Get all quotes with their IDs and creation dates.
+    if not quote_corpus.is_fresh():
+        await run_db(quote_corpus.refresh)
+    return quote_corpus.random_text() or NO_QUOTES_TEXT
+
+
+def get_quotes_page(after_id: int = None, limit: int = 10, backward: bool = False) -> list[tuple]:
+    """
+    Get one page of quotes, newest first, using keyset pagination on id.
+    Returns the page after the `after_id` quote, or the page before it when `backward` is set.
     Returns list of tuples: (id, text, created_at)
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, text, created_at FROM quotes ORDER BY created_at DESC")
-    quotes = [(row['id'], row['text'], row['created_at']) for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
-    return quotes
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        if after_id is None:
+            cursor.execute("SELECT id, text, created_at FROM quotes ORDER BY id DESC LIMIT %s", (limit,))
+        elif backward:
+            cursor.execute("SELECT id, text, created_at FROM quotes WHERE id > %s ORDER BY id ASC LIMIT %s", (after_id, limit))
+        else:
+            cursor.execute("SELECT id, text, created_at FROM quotes WHERE id < %s ORDER BY id DESC LIMIT %s", (after_id, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    if backward:
+        rows.reverse()
+    return [(row['id'], row['text'], row['created_at']) for row in rows]
+
+
+def get_quote_by_id(quote_id: int) -> dict:
+    """
+    Get quote info by ID.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, text, created_at FROM quotes WHERE id = %s", (quote_id,))
+        result = cursor.fetchone()
+        cursor.close()
+    return dict(result) if result else None
 
 
 def delete_quote(quote_id: int) -> bool:
@@ -45,14 +136,24 @@ def delete_quote(quote_id: int) -> bool:
     Delete a quote by its ID.
     """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM quotes WHERE id = %s", (quote_id,))
-        conn.commit()
-        deleted = cursor.rowcount > 0
-        cursor.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM quotes WHERE id = %s", (quote_id,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                version = bump_content_version(cursor, 'quotes')
+            conn.commit()
+            cursor.close()
+        if deleted:
+            quote_corpus.remove(quote_id, version)
         return deleted
     except Exception as exception:
         print(exception)
         return False
+
+
+add_quote_async = awaitable(add_quote)
+get_quotes_page_async = awaitable(get_quotes_page)
+get_quote_by_id_async = awaitable(get_quote_by_id)
+delete_quote_async = awaitable(delete_quote)
+load_quote_corpus_async = awaitable(load_quote_corpus)
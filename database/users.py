@@ -1,25 +1,161 @@
-from database.postgres import get_connection
+import threading
+from array import array
+from bisect import bisect_left
+
+from database.postgres import awaitable, pooled_connection
+
+
+class RoleIndex:
+    """
+    In-memory role -> sorted array of active user IDs, warmed at startup.
+    add_user and deactivate_users write through to it; reconcile() rebuilds it
+    from the users table.
+    """
+
+    def __init__(self):
+        self._roles = {}
+        self._lock = threading.Lock()
+        # One list per reconcile in progress, recording the writes made while it loads
+        self._journals = []
+        self.loaded = False
+
+    def reconcile(self):
+        journal = []
+        with self._lock:
+            self._journals.append(journal)
+        try:
+            with pooled_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, role FROM users WHERE is_active ORDER BY id")
+                rows = cursor.fetchall()
+                cursor.close()
+        except Exception:
+            with self._lock:
+                self._journals.remove(journal)
+            raise
+
+        roles = {}
+        for row in rows:
+            roles.setdefault(row['role'], array('q')).append(row['id'])
+        with self._lock:
+            self._journals.remove(journal)
+            # The snapshot may predate writes made while it loaded; apply them again
+            for apply, args in journal:
+                apply(roles, *args)
+            self._roles = roles
+            self.loaded = True
+
+    def add(self, user_id: int, role: str):
+        with self._lock:
+            self._record(self._insert, user_id, role)
+            self._insert(self._roles, user_id, role)
+
+    def remove(self, user_id: int):
+        with self._lock:
+            self._record(self._delete, user_id)
+            self._delete(self._roles, user_id)
+
+    def _record(self, apply, *args):
+        for journal in self._journals:
+            journal.append((apply, args))
+
+    @staticmethod
+    def _insert(roles: dict, user_id: int, role: str):
+        user_ids = roles.setdefault(role, array('q'))
+        position = bisect_left(user_ids, user_id)
+        if position == len(user_ids) or user_ids[position] != user_id:
+            user_ids.insert(position, user_id)
+
+    @staticmethod
+    def _delete(roles: dict, user_id: int):
+        for user_ids in roles.values():
+            position = bisect_left(user_ids, user_id)
+            if position < len(user_ids) and user_ids[position] == user_id:
+                del user_ids[position]
+
+    def user_ids(self, role: str) -> list[int]:
+        with self._lock:
+            return self._roles.get(role, array('q')).tolist()
+
+    def role_of(self, user_id: int):
+        with self._lock:
+            for role, user_ids in self._roles.items():
+                position = bisect_left(user_ids, user_id)
+                if position < len(user_ids) and user_ids[position] == user_id:
+                    return role
+        return None
+
+
+role_index = RoleIndex()
+
+
+def reconcile_role_index():
+    role_index.reconcile()
 
 
 def add_user(user_id: int, username: str, first_name: str, role: str) -> bool:
+    """
+    Register a user, or reactivate one previously marked unreachable, and put them in
+    the role index. Returns True only when the user was not in the table before.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO users (id, username, first_name, role) VALUES (%s, %s, %s, %s) ON CONFLICT (id) DO NOTHING",
-                       (user_id, username, first_name, role))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            # The update always runs on conflict so the stored role comes back for users
+            # registered through another replica too; xmax = 0 marks a fresh insert
+            cursor.execute("""
+                INSERT INTO users (id, username, first_name, role) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (id) DO UPDATE SET is_active = TRUE
+                RETURNING role, xmax = 0 AS inserted
+            """, (user_id, username, first_name, role))
+            result = cursor.fetchone()
+            conn.commit()
+            cursor.close()
+        role_index.add(user_id, result['role'])
+        return result['inserted']
     except Exception:
         return False
 
 
 def get_all_user_ids_by_role(role: str) -> list[int]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE role = %s", (role,))
-    user_ids = [row['id'] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    if role_index.loaded:
+        return role_index.user_ids(role)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM users WHERE role = %s AND is_active", (role,))
+        user_ids = [row['id'] for row in cursor.fetchall()]
+        cursor.close()
     return user_ids
+
+
+def deactivate_users(user_ids: list[int]) -> int:
+    """
+    Mark users who blocked the bot or deleted their account as inactive, so fan-outs skip them.
+    Returns the number of users deactivated.
+    """
+    if not user_ids:
+        return 0
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE users SET is_active = FALSE WHERE id = ANY(%s) AND is_active", (list(user_ids),))
+        deactivated = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    for user_id in user_ids:
+        role_index.remove(user_id)
+    return deactivated
+
+
+async def get_all_user_ids_by_role_async(role: str) -> list[int]:
+    """
+    Serve fan-out recipient lists from the role index without leaving the event loop.
+    """
+    if role_index.loaded:
+        return role_index.user_ids(role)
+    return await _get_all_user_ids_by_role_from_db(role)
+
+
+add_user_async = awaitable(add_user)
+deactivate_users_async = awaitable(deactivate_users)
+_get_all_user_ids_by_role_from_db = awaitable(get_all_user_ids_by_role)
+reconcile_role_index_async = awaitable(reconcile_role_index)
@@ -0,0 +1,118 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from database.postgres import pooled_connection
+
+
+def bump_content_version(cursor, name: str) -> int:
+    """
+    Increment the version counter of a content table inside the caller's transaction.
+    Returns the new version.
+    """
+    cursor.execute("""
+        INSERT INTO content_versions (name, version) VALUES (%s, 1)
+        ON CONFLICT (name) DO UPDATE SET version = content_versions.version + 1
+        RETURNING version
+    """, (name,))
+    return cursor.fetchone()['version']
+
+
+def fetch_content_version(cursor, name: str) -> int:
+    """
+    Read the version counter of a content table with the caller's cursor.
+    """
+    cursor.execute("SELECT version FROM content_versions WHERE name = %s", (name,))
+    result = cursor.fetchone()
+    return result['version'] if result else 0
+
+
+def get_content_version(name: str) -> int:
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        version = fetch_content_version(cursor, name)
+        cursor.close()
+    return version
+
+
+class VersionedCache(ABC):
+    """
+    Base for in-memory copies of a content table tracked by content_versions.
+    Local writes patch the copy in place; writes made by other processes are
+    picked up by comparing the version at most once per check interval.
+    Subclasses implement _select(cursor) and _replace(rows).
+    """
+
+    name = None
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._version is not None
+
+    @property
+    def version(self):
+        return self._version
+
+    def is_fresh(self) -> bool:
+        return self.loaded and time.monotonic() - self._checked_at < self.check_interval
+
+    def load(self):
+        """
+        Load the table and its version from a single snapshot.
+        """
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            version = fetch_content_version(cursor, self.name)
+            rows = self._select(cursor)
+            conn.commit()
+            cursor.close()
+
+        with self._lock:
+            self._replace(rows)
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """
+        Reload the copy if another process changed the table.
+        """
+        if not self.loaded:
+            self.load()
+            return
+        version = get_content_version(self.name)
+        if version != self._version:
+            self.load()
+        else:
+            self._checked_at = time.monotonic()
+
+    def _patch(self, version: int, apply) -> bool:
+        """
+        Apply a local write if it directly follows the cached version.
+        Otherwise a write from elsewhere was missed and the next check reloads everything.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                self._checked_at = 0.0
+                return False
+            apply()
+            self._version = version
+            return True
+
+    @abstractmethod
+    def _select(self, cursor) -> list:
+        """
+        Query the rows of the table with the snapshot's cursor.
+        """
+
+    @abstractmethod
+    def _replace(self, rows: list):
+        """
+        Swap the cached copy for `rows`; called with the cache lock held.
+        """
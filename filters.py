@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from aiogram import types
 from aiogram.filters import BaseFilter
@@ -17,5 +18,8 @@ class IsAdmin(BaseFilter):
     def __init__(self):
         self.admin_ids = ADMIN_IDS
 
-    async def __call__(self, message: types.Message) -> bool:
+    async def __call__(self, message: types.Message, is_admin: Optional[bool] = None) -> bool:
+        # Resolved once per update by UserContextMiddleware
+        if is_admin is not None:
+            return is_admin
         return message.from_user.id in self.admin_ids
@@ -7,22 +7,25 @@ logger = get_logger(__name__)
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.utils.callback_answer import CallbackAnswer
 from aiogram_calendar import SimpleCalendar, SimpleCalendarCallback
 
-from database.events import add_event, delete_event, get_all_events
-from database.photos import add_photo, get_all_photos, delete_photo, get_photo_by_id
-from database.quotes import add_quote, get_all_quotes, delete_quote
-from database.anonymous import get_all_anonymous_messages, delete_anonymous_message, reply_to_anonymous_message, get_anonymous_message_by_id
-from database.users import get_all_user_ids_by_role
+from broadcast import broadcast_engine, progress_keyboard
+from database.events import add_event_async, delete_event_async, get_events_page_async
+from database.photos import add_photo_async, get_photos_page_async, delete_photo_async, get_photo_by_id_async
+from database.quotes import add_quote_async, get_quotes_page_async, get_quote_by_id_async, delete_quote_async
+from database.anonymous import get_anonymous_messages_page_async, delete_anonymous_message_async, reply_to_anonymous_message_async, get_anonymous_message_by_id_async
+from database.users import get_all_user_ids_by_role_async
 from filters import IsAdmin
-from jobs import schedule_reminder
+from handlers.menu import present, show_with_menu
+from handlers.pagination import Page, fetch_page, paged_keyboard, parse_page_callback
 from states.add_event import AddEventStates
 from states.add_photo import AddPhotoStates
 from states.add_quote import AddQuoteStates
 from states.anonymous import AnonymousStates
 from states.send_all import SendAllStates
 
-router = Router()
+router = Router(name="admin")
 
 
 @router.message(Command("add_event"), IsAdmin())
@@ -31,7 +34,8 @@ async def cmd_add_event(message: Message):
     await message.reply("📅 <b>Давай создадим чудесное событие!</b>\n\nВыбери дату, когда соберемся вместе 💕", reply_markup=markup, parse_mode="HTML")
 
 
-@router.callback_query(SimpleCalendarCallback.filter())
+# The calendar answers some of its own callbacks, so it is answered here rather than up front
+@router.callback_query(SimpleCalendarCallback.filter(), flags={"callback_answer": {"disabled": True}})
 async def process_date_selection(callback: CallbackQuery, state: FSMContext, callback_data: SimpleCalendarCallback):
     result, selected_date = await SimpleCalendar().process_selection(callback, callback_data)
     if result:
@@ -62,18 +66,12 @@ async def process_theme(message: Message, state: FSMContext):
 
 
 @router.message(StateFilter(AddEventStates.waiting_for_place))
-async def process_place(message: Message, state: FSMContext, bot: Bot):
+async def process_place(message: Message, state: FSMContext, is_admin: bool):
     data = await state.get_data()
     place = message.text.strip()
-    event_id = add_event(data['full_datetime'], data['theme'], place)
+    event_id = await add_event_async(data['full_datetime'], data['theme'], place)
     if event_id:
-        await schedule_reminder(bot, data['full_datetime'], event_id, data['theme'], place)
-        await message.reply(f"🎉 <b>Ура! Событие создано!</b>\n\n📅 {data['full_datetime']}\n🎯 {data['theme']}\n📍 {place}\n\n💕 Все участницы получат напоминание за 24 часа!\n\n✨ Спасибо, что делаешь наш клуб таким замечательным!", parse_mode="HTML")
-
-        # Return to main menu after successful event creation
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(message)
-        await send_main_menu(message, is_admin)
+        await show_with_menu(message, f"🎉 <b>Ура! Событие создано!</b>\n\n📅 {data['full_datetime']}\n🎯 {data['theme']}\n📍 {place}\n\n💕 Все участницы получат напоминание перед встречей!\n\n✨ Спасибо, что делаешь наш клуб таким замечательным!", is_admin)
     else:
         await message.reply("💔 <b>Ой, что-то пошло не так</b>\n\n❌ Не удалось добавить событие. Попробуй еще раз или обратись к администратору 💕", parse_mode="HTML")
         return
@@ -88,110 +86,110 @@ async def cmd_add_quote(message: Message, state: FSMContext):
 
 
 @router.message(AddQuoteStates.waiting_for_quote)
-async def process_quote(message: Message, state: FSMContext):
+async def process_quote(message: Message, state: FSMContext, is_admin: bool):
     text = message.text.strip()
     admin_id = message.from_user.id
     admin_username = message.from_user.username or "no_username"
 
-    if add_quote(text):
-        logger.info(f"Admin {admin_id} (@{admin_username}) added quote")
-        await message.reply("💖 <b>Прекрасная цитата добавлена!</b>\n\n✨ Теперь она будет вдохновлять участниц клуба!\n\n🌸 Спасибо за твою заботу! 💕", parse_mode="HTML")
-
-        # Return to main menu after successful quote addition
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(message)
-        await send_main_menu(message, is_admin)
+    if await add_quote_async(text):
+        logger.info("Admin %s (@%s) added quote", admin_id, admin_username)
+        await show_with_menu(message, "💖 <b>Прекрасная цитата добавлена!</b>\n\n✨ Теперь она будет вдохновлять участниц клуба!\n\n🌸 Спасибо за твою заботу! 💕", is_admin)
     else:
-        logger.error(f"Failed to add quote for admin {admin_id}")
+        logger.error("Failed to add quote for admin %s", admin_id)
         await message.reply("💔 <b>Ой, что-то пошло не так</b>\n\n❌ Не удалось добавить цитату. Попробуй еще раз 💕", parse_mode="HTML")
         return
 
     await state.clear()
 
 
+def render_quotes_list(page: Page) -> tuple:
+    response = "📝 <b>Все цитаты в базе данных:</b>\n\n"
+    for quote_id, text, created_at in page.rows:
+        truncated_text = text[:100] + "..." if len(text) > 100 else text
+        response += f"🆔 <b>{quote_id}</b> - {truncated_text}\n📅 {created_at}\n\n"
+    return response, paged_keyboard([], "quotes_page", "list", page)
+
+
+def render_quotes_delete(page: Page) -> tuple:
+    buttons = []
+    for quote_id, text, created_at in page.rows:
+        if text and len(text) > 50:
+            display_name = text[:50] + "..."
+        elif text:
+            display_name = text
+        else:
+            display_name = "Без текста"
+        buttons.append(InlineKeyboardButton(text=f"🆔{quote_id}: {display_name}", callback_data=f"del_quote:{quote_id}"))
+    return "🗑️ <b>Выберите цитату для удаления:</b>", paged_keyboard(buttons, "quotes_page", "del", page)
+
+
+QUOTE_VIEWS = {"list": render_quotes_list, "del": render_quotes_delete}
+
+
 @router.message(Command("list_quotes"), IsAdmin())
 async def cmd_list_quotes(message: Message):
     """
-    Handler for the /list_quotes command. Shows all quotes with their IDs.
+    Handler for the /list_quotes command. Shows quotes page by page.
     """
-    quotes = get_all_quotes()
-    if not quotes:
+    page = await fetch_page(get_quotes_page_async)
+    if not page.rows:
         await message.reply("📝 Цитат пока нет в базе данных.")
         return
 
-    response = "📝 <b>Все цитаты в базе данных:</b>\n\n"
-    for quote_id, text, created_at in quotes:
-        truncated_text = text[:100] + "..." if len(text) > 100 else text
-        response += f"🆔 <b>{quote_id}</b> - {truncated_text}\n📅 {created_at}\n\n"
-
-    if len(response) > 4000:
-        parts = []
-        current_part = "📝 <b>Все цитаты в базе данных:</b>\n\n"
-        for quote_id, text, created_at in quotes:
-            truncated_text = text[:100] + "..." if len(text) > 100 else text
-            new_line = f"🆔 <b>{quote_id}</b> - {truncated_text}\n📅 {created_at}\n\n"
-            if len(current_part + new_line) > 4000:
-                parts.append(current_part)
-                current_part = "📝 <b>Продолжение:</b>\n\n" + new_line
-            else:
-                current_part += new_line
-        parts.append(current_part)
-
-        for part in parts:
-            await message.reply(part, parse_mode="HTML")
-    else:
-        await message.reply(response, parse_mode="HTML")
+    response, keyboard = render_quotes_list(page)
+    await message.reply(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.message(Command("delete_quote"), IsAdmin())
 async def cmd_delete_quote(message: Message):
     """
-    Handler for the /delete_quote command. Shows inline keyboard for quote selection.
+    Handler for the /delete_quote command. Shows paged inline keyboard for quote selection.
     """
-    quotes = get_all_quotes()
-    if not quotes:
+    page = await fetch_page(get_quotes_page_async)
+    if not page.rows:
         await message.reply("📝 Цитат для удаления нет.")
         return
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-    for quote_id, text, created_at in quotes:
-        truncated_text = text[:50] + "..." if len(text) > 50 else text
-        keyboard.inline_keyboard.append([InlineKeyboardButton(
-            text=f"🆔{quote_id}: {truncated_text}", callback_data=f"del_quote:{quote_id}"
-        )])
+    response, keyboard = render_quotes_delete(page)
+    await message.reply(response, reply_markup=keyboard, parse_mode="HTML")
 
-    await message.reply("🗑️ <b>Выберите цитату для удаления:</b>", reply_markup=keyboard, parse_mode="HTML")
+
+@router.callback_query(F.data.startswith("quotes_page:"), IsAdmin())
+async def process_quotes_page(callback: CallbackQuery):
+    """
+    Handler for ◀️/▶️ navigation in quote listings.
+    """
+    view, direction, cursor = parse_page_callback(callback.data)
+    page = await fetch_page(get_quotes_page_async, cursor, direction)
+    if not page.rows:
+        await callback.message.edit_text("📝 <b>Цитат пока нет в базе данных</b>\n\n💕 Но скоро появятся прекрасные мудрые слова! ✨", parse_mode="HTML")
+    else:
+        response, keyboard = QUOTE_VIEWS[view](page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("del_quote:"))
-async def process_delete_quote(callback: CallbackQuery):
+async def process_delete_quote(callback: CallbackQuery, is_admin: bool):
     """
     Handler for processing quote deletion via inline keyboard.
     """
     quote_id = int(callback.data.split(":")[1])
 
     # Get quote info before deletion
-    quotes = get_all_quotes()
-    quote_info = next((q for q in quotes if q[0] == quote_id), None)
+    quote_info = await get_quote_by_id_async(quote_id)
 
     if not quote_info:
         await callback.message.edit_text("❌ Цитата не найдена.")
-        await callback.answer()
         return
 
     # Delete the quote
-    if delete_quote(quote_id):
-        truncated_text = quote_info[1][:50] + "..." if len(quote_info[1]) > 50 else quote_info[1]
-        await callback.message.edit_text(f"✅ Цитата успешно удалена!\n\n💬 Текст: {truncated_text}")
-
-        # Return to main menu after successful deletion
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+    if await delete_quote_async(quote_id):
+        truncated_text = quote_info['text'][:50] + "..." if len(quote_info['text']) > 50 else quote_info['text']
+        await show_with_menu(callback.message, f"✅ Цитата успешно удалена!\n\n💬 Текст: {truncated_text}", is_admin,
+                             edit=True, parse_mode=None)
     else:
         await callback.message.edit_text("❌ Ошибка при удалении цитаты.")
 
-    await callback.answer()
 
 
 @router.message(Command("add_photo"), IsAdmin())
@@ -257,7 +255,7 @@ async def process_photo_upload(message: Message, state: FSMContext):
         await state.set_state(AddPhotoStates.waiting_for_caption)
 
     except Exception as e:
-        logger.error(f"Error in photo upload: {e}")
+        logger.error("Error in photo upload: %s", e)
         await message.reply(
             "💔 <b>Произошла ошибка при обработке фото</b>\n\n"
             "❌ Попробуй еще раз или обратись к администратору 💕",
@@ -267,7 +265,7 @@ async def process_photo_upload(message: Message, state: FSMContext):
 
 
 @router.message(AddPhotoStates.waiting_for_caption)
-async def process_caption(message: Message, state: FSMContext):
+async def process_caption(message: Message, state: FSMContext, is_admin: bool):
     """
     Handler for processing photo caption.
     """
@@ -291,7 +289,7 @@ async def process_caption(message: Message, state: FSMContext):
             return
 
         # Add photo with or without caption
-        photo_result = add_photo(
+        photo_result = await add_photo_async(
             file_id=data['file_id'],
             file_unique_id=data['file_unique_id'],
             filename=data.get('filename'),
@@ -304,145 +302,133 @@ async def process_caption(message: Message, state: FSMContext):
             admin_username = message.from_user.username or "no_username"
 
             if caption:
-                logger.info(f"Admin {admin_id} (@{admin_username}) added photo with caption")
-                await message.reply("🌟 <b>Чудесная фотография добавлена!</b>\n\n💖 С таким красивым описанием она точно вдохновит участниц!\n\n✨ Спасибо за твою заботу! 💕", parse_mode="HTML")
+                logger.info("Admin %s (@%s) added photo with caption", admin_id, admin_username)
+                await show_with_menu(message, "🌟 <b>Чудесная фотография добавлена!</b>\n\n💖 С таким красивым описанием она точно вдохновит участниц!\n\n✨ Спасибо за твою заботу! 💕", is_admin)
             else:
-                logger.info(f"Admin {admin_id} (@{admin_username}) added photo without caption")
-                await message.reply("🌸 <b>Прекрасная фотография добавлена!</b>\n\n💕 Она будет радовать участниц клуба!\n\n✨ Спасибо за твою заботу! 💖", parse_mode="HTML")
-
-            # Return to main menu after successful photo addition
-            from handlers.user import is_admin_user, send_main_menu
-            is_admin = await is_admin_user(message)
-            await send_main_menu(message, is_admin)
+                logger.info("Admin %s (@%s) added photo without caption", admin_id, admin_username)
+                await show_with_menu(message, "🌸 <b>Прекрасная фотография добавлена!</b>\n\n💕 Она будет радовать участниц клуба!\n\n✨ Спасибо за твою заботу! 💖", is_admin)
             await state.clear()
         else:
-            logger.error(f"Failed to add photo for admin {message.from_user.id} - add_photo returned: {photo_result}")
+            logger.error("Failed to add photo for admin %s - add_photo returned: %s", message.from_user.id, photo_result)
             await message.reply("💔 <b>Не удалось сохранить фото</b>\n\n❌ Проверь подключение к базе данных и попробуй еще раз 💕", parse_mode="HTML")
             return
 
     except Exception as e:
-        logger.error(f"Error in caption processing: {e}")
+        logger.error("Error in caption processing: %s", e)
         await message.reply("💔 <b>Произошла ошибка</b>\n\n❌ Попробуй начать заново с /add_photo 💕", parse_mode="HTML")
         await state.clear()
 
 
-@router.message(Command("list_photos"), IsAdmin())
-async def cmd_list_photos(message: Message):
-    """
-    Handler for the /list_photos command. Shows all photos.
-    """
-    photos = get_all_photos()
-    if not photos:
-        await message.reply("📸 <b>Коллекция фотографий пока пустая</b>\n\n💕 Но скоро здесь появятся прекрасные вдохновляющие картинки! 🌟", parse_mode="HTML")
-        return
+def photo_display_name(filename, caption, uploaded_at, max_length: int) -> str:
+    if caption and caption.strip():
+        return caption.strip()[:max_length] + "..." if len(caption.strip()) > max_length else caption.strip()
+    if filename:
+        return filename[:max_length] + "..." if len(filename) > max_length else filename
+    upload_date = str(uploaded_at).split()[0]
+    return f"Фото от {upload_date}"
+
 
+def render_photos_list(page: Page) -> tuple:
     response = "📸 <b>Все фотографии в базе данных:</b>\n\n"
-    for photo_id, file_id, filename, caption, uploaded_at in photos:
+    for photo_id, file_id, filename, caption, uploaded_at in page.rows:
         if caption and caption.strip():
-            display_name = f"📝 {caption.strip()[:40]}..." if len(caption.strip()) > 40 else f"📝 {caption.strip()}"
+            icon = "📝"
         elif filename:
-            display_name = f"📄 {filename[:40]}..." if len(filename) > 40 else f"📄 {filename}"
+            icon = "📄"
         else:
-            upload_date = str(uploaded_at).split()[0]
-            display_name = f"📸 Фото от {upload_date}"
-
+            icon = "📸"
+        display_name = f"{icon} {photo_display_name(filename, caption, uploaded_at, 40)}"
         response += f"🆔 <b>{photo_id}</b>\n{display_name}\n📅 {uploaded_at}\n\n"
+    return response, paged_keyboard([], "photos_page", "list", page)
 
-    # Telegram has message length limits, so split if too long
-    if len(response) > 4000:
-        parts = []
-        current_part = "📸 <b>Все фотографии в базе данных:</b>\n\n"
-        for photo_id, file_id, filename, caption, uploaded_at in photos:
-            # Create the same display name logic as above
-            if caption and caption.strip():
-                display_name = f"📝 {caption.strip()[:40]}..." if len(caption.strip()) > 40 else f"📝 {caption.strip()}"
-            elif filename:
-                display_name = f"📄 {filename[:40]}..." if len(filename) > 40 else f"📄 {filename}"
-            else:
-                upload_date = str(uploaded_at).split()[0]
-                display_name = f"📸 Фото от {upload_date}"
 
-            new_line = f"🆔 <b>{photo_id}</b>\n{display_name}\n📅 {uploaded_at}\n\n"
-            if len(current_part + new_line) > 4000:
-                parts.append(current_part)
-                current_part = "📸 <b>Продолжение:</b>\n\n" + new_line
-            else:
-                current_part += new_line
-        parts.append(current_part)
+def render_photos_delete(page: Page) -> tuple:
+    buttons = []
+    for photo_id, file_id, filename, caption, uploaded_at in page.rows:
+        display_name = photo_display_name(filename, caption, uploaded_at, 35)
+        buttons.append(InlineKeyboardButton(text=f"🆔{photo_id}: {display_name}", callback_data=f"del_photo:{photo_id}"))
+    return "🗑️ <b>Выберите фотографию для удаления:</b>", paged_keyboard(buttons, "photos_page", "del", page)
 
-        for part in parts:
-            await message.reply(part, parse_mode="HTML")
-    else:
-        await message.reply(response, parse_mode="HTML")
+
+PHOTO_VIEWS = {"list": render_photos_list, "del": render_photos_delete}
+
+
+@router.message(Command("list_photos"), IsAdmin())
+async def cmd_list_photos(message: Message):
+    """
+    Handler for the /list_photos command. Shows photos page by page.
+    """
+    page = await fetch_page(get_photos_page_async)
+    if not page.rows:
+        await message.reply("📸 <b>Коллекция фотографий пока пустая</b>\n\n💕 Но скоро здесь появятся прекрасные вдохновляющие картинки! 🌟", parse_mode="HTML")
+        return
+
+    response, keyboard = render_photos_list(page)
+    await message.reply(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.message(Command("delete_photo"), IsAdmin())
 async def cmd_delete_photo(message: Message):
     """
-    Handler for the /delete_photo command. Shows inline keyboard for photo selection.
+    Handler for the /delete_photo command. Shows paged inline keyboard for photo selection.
     """
-    photos = get_all_photos()
-    if not photos:
+    page = await fetch_page(get_photos_page_async)
+    if not page.rows:
         await message.reply("📸 <b>Все фотографии в безопасности!</b>\n\n💕 Пока нет фотографий для удаления 🌸", parse_mode="HTML")
         return
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-    for photo_id, file_id, filename, caption, uploaded_at in photos:
-        if caption and caption.strip():
-            display_name = caption.strip()[:35] + "..." if len(caption.strip()) > 35 else caption.strip()
-        elif filename:
-            display_name = filename[:35] + "..." if len(filename) > 35 else filename
-        else:
-            upload_date = str(uploaded_at).split()[0]
-            display_name = f"Фото от {upload_date}"
+    response, keyboard = render_photos_delete(page)
+    await message.reply(response, reply_markup=keyboard, parse_mode="HTML")
 
-        keyboard.inline_keyboard.append([InlineKeyboardButton(
-            text=f"🆔{photo_id}: {display_name}", callback_data=f"del_photo:{photo_id}"
-        )])
 
-    await message.reply("🗑️ <b>Выберите фотографию для удаления:</b>", reply_markup=keyboard, parse_mode="HTML")
+@router.callback_query(F.data.startswith("photos_page:"), IsAdmin())
+async def process_photos_page(callback: CallbackQuery):
+    """
+    Handler for ◀️/▶️ navigation in photo listings.
+    """
+    view, direction, cursor = parse_page_callback(callback.data)
+    page = await fetch_page(get_photos_page_async, cursor, direction)
+    if not page.rows:
+        await callback.message.edit_text("📸 <b>Коллекция фотографий пока пустая</b>\n\n💕 Но скоро здесь появятся прекрасные вдохновляющие картинки! 🌟", parse_mode="HTML")
+    else:
+        response, keyboard = PHOTO_VIEWS[view](page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("del_photo:"))
-async def process_delete_photo(callback: CallbackQuery):
+async def process_delete_photo(callback: CallbackQuery, is_admin: bool):
     """
     Handler for processing photo deletion via inline keyboard.
     """
     photo_id = int(callback.data.split(":")[1])
 
     # Get photo info before deletion
-    photo = get_photo_by_id(photo_id)
+    photo = await get_photo_by_id_async(photo_id)
     if not photo:
         await callback.message.edit_text("❌ Фотография не найдена.")
-        await callback.answer()
         return
 
     # Delete the photo
-    if delete_photo(photo_id):
+    if await delete_photo_async(photo_id):
         filename_display = photo['filename'] or "Без имени"
-        await callback.message.edit_text(f"✅ Фотография удалена!\n\n📸 {filename_display}")
-
-        # Return to main menu after successful deletion
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+        await show_with_menu(callback.message, f"✅ Фотография удалена!\n\n📸 {filename_display}", is_admin,
+                             edit=True, parse_mode=None)
     else:
         await callback.message.edit_text("❌ Ошибка при удалении фотографии.")
 
-    await callback.answer()
 
 
 # === NEW MANAGEMENT INTERFACE ===
 
 @router.message(Command("manage_quotes"), IsAdmin())
-async def cmd_manage_quotes(message: Message):
+async def cmd_manage_quotes(message: Message, edit: bool = False):
     """
     Handler for the /manage_quotes command. Shows quote management options.
     """
     admin_id = message.from_user.id
     admin_username = message.from_user.username or "no_username"
 
-    logger.info(f"Admin {admin_id} (@{admin_username}) opened quotes management")
+    logger.info("Admin %s (@%s) opened quotes management", admin_id, admin_username)
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="✨ Добавить цитату", callback_data="quotes:add")],
@@ -451,15 +437,11 @@ async def cmd_manage_quotes(message: Message):
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="menu:back_to_main")]
     ])
 
-    await message.reply(
-        "💭 <b>Управление цитатами мудрости</b>\n\n💕 Выбери, что хочешь сделать с цитатами клуба ✨",
-        reply_markup=keyboard,
-        parse_mode="HTML"
-    )
+    await present(message, "💭 <b>Управление цитатами мудрости</b>\n\n💕 Выбери, что хочешь сделать с цитатами клуба ✨", keyboard, edit=edit)
 
 
 @router.message(Command("manage_photos"), IsAdmin())
-async def cmd_manage_photos(message: Message):
+async def cmd_manage_photos(message: Message, edit: bool = False):
     """
     Handler for the /manage_photos command. Shows photo management options.
     """
@@ -470,15 +452,11 @@ async def cmd_manage_photos(message: Message):
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="menu:back_to_main")]
     ])
 
-    await message.reply(
-        "🌟 <b>Управление вдохновляющими фотографиями</b>\n\n💕 Выбери, что хочешь сделать с фото коллекцией ✨",
-        reply_markup=keyboard,
-        parse_mode="HTML"
-    )
+    await present(message, "🌟 <b>Управление вдохновляющими фотографиями</b>\n\n💕 Выбери, что хочешь сделать с фото коллекцией ✨", keyboard, edit=edit)
 
 
 @router.message(Command("manage_events"), IsAdmin())
-async def cmd_manage_events(message: Message):
+async def cmd_manage_events(message: Message, edit: bool = False):
     """
     Handler for the /manage_events command. Shows event management options.
     """
@@ -489,11 +467,7 @@ async def cmd_manage_events(message: Message):
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="menu:back_to_main")]
     ])
 
-    await message.reply(
-        "🎊 <b>Управление событиями клуба</b>\n\n💕 Выбери, что хочешь сделать с расписанием мероприятий ✨",
-        reply_markup=keyboard,
-        parse_mode="HTML"
-    )
+    await present(message, "🎊 <b>Управление событиями клуба</b>\n\n💕 Выбери, что хочешь сделать с расписанием мероприятий ✨", keyboard, edit=edit)
 
 
 @router.callback_query(F.data.startswith("quotes:"))
@@ -505,56 +479,30 @@ async def process_quotes_management(callback: CallbackQuery, state: FSMContext):
     admin_username = callback.from_user.username or "no_username"
     action = callback.data.split(":")[1]
 
-    logger.info(f"Admin {admin_id} (@{admin_username}) selected quotes action: {action}")
+    logger.info("Admin %s (@%s) selected quotes action: %s", admin_id, admin_username, action)
 
     if action == "add":
         await callback.message.edit_text("💭 <b>Какая мудрая цитата тебя вдохновила?</b>\n\n✨ Поделись ею с участницами клуба! 💕", parse_mode="HTML")
         await state.set_state(AddQuoteStates.waiting_for_quote)
 
     elif action == "list":
-        quotes = get_all_quotes()
-        if not quotes:
+        page = await fetch_page(get_quotes_page_async)
+        if not page.rows:
             await callback.message.edit_text("📝 <b>Цитат пока нет в базе данных</b>\n\n💕 Но скоро появятся прекрасные мудрые слова! ✨", parse_mode="HTML")
             return
 
-        response = "📝 <b>Все цитаты в базе данных:</b>\n\n"
-        for quote_id, text, created_at in quotes:
-            if text and len(text) > 50:
-                display_name = f"💭 {text[:50]}..."
-            elif text:
-                display_name = f"💭 {text}"
-            else:
-                display_name = "💭 Без текста"
-
-            response += f"🆔 <b>{quote_id}</b>\n{display_name}\n📅 {created_at}\n\n"
-
-        if len(response) > 4000:
-            await callback.message.edit_text("📝 <b>Слишком много цитат для отображения</b>\n\n💕 Используй индивидуальные команды для управления! ✨", parse_mode="HTML")
-        else:
-            await callback.message.edit_text(response, parse_mode="HTML")
+        response, keyboard = render_quotes_list(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
     elif action == "delete":
-        quotes = get_all_quotes()
-        if not quotes:
+        page = await fetch_page(get_quotes_page_async)
+        if not page.rows:
             await callback.message.edit_text("📝 <b>Цитат для удаления нет</b>\n\n💕 Все цитаты в безопасности! 🌸", parse_mode="HTML")
             return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-        for quote_id, text, created_at in quotes:
-            if text and len(text) > 50:
-                display_name = text[:50] + "..."
-            elif text:
-                display_name = text
-            else:
-                display_name = "Без текста"
-
-            keyboard.inline_keyboard.append([InlineKeyboardButton(
-                text=f"🆔{quote_id}: {display_name}", callback_data=f"del_quote:{quote_id}"
-            )])
+        response, keyboard = render_quotes_delete(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
-        await callback.message.edit_text("🗑️ <b>Выберите цитату для удаления:</b>", reply_markup=keyboard, parse_mode="HTML")
-
-    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("photos:"))
@@ -569,51 +517,52 @@ async def process_photos_management(callback: CallbackQuery, state: FSMContext):
         await state.set_state(AddPhotoStates.waiting_for_photo)
 
     elif action == "list":
-        photos = get_all_photos()
-        if not photos:
+        page = await fetch_page(get_photos_page_async)
+        if not page.rows:
             await callback.message.edit_text("📸 <b>Коллекция фотографий пока пустая</b>\n\n💕 Но скоро здесь появятся прекрасные вдохновляющие картинки! 🌟", parse_mode="HTML")
             return
 
-        response = "📸 <b>Все фотографии в базе данных:</b>\n\n"
-        for photo_id, file_id, filename, caption, uploaded_at in photos:
-            if caption and caption.strip():
-                display_name = f"📝 {caption.strip()[:40]}..." if len(caption.strip()) > 40 else f"📝 {caption.strip()}"
-            elif filename:
-                display_name = f"📄 {filename[:40]}..." if len(filename) > 40 else f"📄 {filename}"
-            else:
-                upload_date = str(uploaded_at).split()[0]
-                display_name = f"📸 Фото от {upload_date}"
-
-            response += f"🆔 <b>{photo_id}</b>\n{display_name}\n📅 {uploaded_at}\n\n"
-
-        if len(response) > 4000:
-            await callback.message.edit_text("📸 <b>Слишком много фотографий для отображения</b>\n\n💕 Используй индивидуальные команды для управления! ✨", parse_mode="HTML")
-        else:
-            await callback.message.edit_text(response, parse_mode="HTML")
+        response, keyboard = render_photos_list(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
     elif action == "delete":
-        photos = get_all_photos()
-        if not photos:
+        page = await fetch_page(get_photos_page_async)
+        if not page.rows:
             await callback.message.edit_text("📸 <b>Все фотографии в безопасности!</b>\n\n💕 Пока нет фотографий для удаления 🌸", parse_mode="HTML")
             return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-        for photo_id, file_id, filename, caption, uploaded_at in photos:
-            if caption and caption.strip():
-                display_name = caption.strip()[:35] + "..." if len(caption.strip()) > 35 else caption.strip()
-            elif filename:
-                display_name = filename[:35] + "..." if len(filename) > 35 else filename
-            else:
-                upload_date = str(uploaded_at).split()[0]
-                display_name = f"Фото от {upload_date}"
+        response, keyboard = render_photos_delete(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
-            keyboard.inline_keyboard.append([InlineKeyboardButton(
-                text=f"🆔{photo_id}: {display_name}", callback_data=f"del_photo:{photo_id}"
-            )])
 
-        await callback.message.edit_text("🗑️ <b>Выберите фотографию для удаления:</b>", reply_markup=keyboard, parse_mode="HTML")
 
-    await callback.answer()
+def format_event_date(planned_at, date_format: str = '%d.%m.%Y в %H:%M') -> str:
+    if isinstance(planned_at, datetime):
+        return planned_at.strftime(date_format)
+    try:
+        return datetime.strptime(str(planned_at), '%Y-%m-%d %H:%M:%S').strftime(date_format)
+    except ValueError:
+        return str(planned_at)
+
+
+def render_events_list(page: Page) -> tuple:
+    response = "🎊 <b>Все события в расписании:</b>\n\n"
+    for event_id, planned_at, place, theme in page.rows:
+        theme = theme[:100] + "..." if len(theme) > 100 else theme
+        place = place[:100] + "..." if len(place) > 100 else place
+        response += f"🆔 <b>{event_id}</b>\n🎉 {theme}\n📅 {format_event_date(planned_at)}\n📍 {place}\n\n"
+    return response, paged_keyboard([], "events_page", "list", page)
+
+
+def render_events_delete(page: Page) -> tuple:
+    buttons = []
+    for event_id, planned_at, place, theme in page.rows:
+        display_date = format_event_date(planned_at, '%d.%m %H:%M')
+        buttons.append(InlineKeyboardButton(text=f"{display_date} - {theme[:30]}...", callback_data=f"del_event:{event_id}"))
+    return "🗑️ <b>Выбери событие для удаления:</b>\n\n💕 Выбери то, которое нужно отменить 🌸", paged_keyboard(buttons, "events_page", "del", page)
+
+
+EVENT_VIEWS = {"list": render_events_list, "del": render_events_delete}
 
 
 @router.callback_query(F.data.startswith("events:"))
@@ -628,53 +577,37 @@ async def process_events_management(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text("📅 <b>Давай создадим чудесное событие!</b>\n\nВыбери дату, когда соберемся вместе 💕", reply_markup=markup, parse_mode="HTML")
 
     elif action == "list":
-        events = get_all_events()
-        if not events:
+        page = await fetch_page(get_events_page_async)
+        if not page.rows:
             await callback.message.edit_text("📅 <b>Событий пока нет в расписании</b>\n\n💕 Но скоро появятся интересные мероприятия! 🌟", parse_mode="HTML")
             return
 
-        response = "🎊 <b>Все события в расписании:</b>\n\n"
-        for event_id, planned_at, theme, place in events:
-            if isinstance(planned_at, datetime):
-                formatted_date = planned_at.strftime('%d.%m.%Y в %H:%M')
-            else:
-                try:
-                    event_dt = datetime.strptime(str(planned_at), '%Y-%m-%d %H:%M:%S')
-                    formatted_date = event_dt.strftime('%d.%m.%Y в %H:%M')
-                except:
-                    formatted_date = str(planned_at)
-
-            response += f"🆔 <b>{event_id}</b>\n🎉 {theme}\n📅 {formatted_date}\n📍 {place}\n\n"
-
-        if len(response) > 4000:
-            await callback.message.edit_text("🎊 <b>Слишком много событий для отображения</b>\n\n💕 Используй индивидуальные команды для управления! ✨", parse_mode="HTML")
-        else:
-            await callback.message.edit_text(response, parse_mode="HTML")
+        response, keyboard = render_events_list(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
     elif action == "delete":
-        events = get_all_events()
-        if not events:
+        page = await fetch_page(get_events_page_async)
+        if not page.rows:
             await callback.message.edit_text("📅 <b>Все события в расписании!</b>\n\n💕 Пока нет событий для удаления 🌸", parse_mode="HTML")
             return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-        for event_id, planned_at, theme, place in events:
-            if isinstance(planned_at, datetime):
-                display_date = planned_at.strftime('%d.%m %H:%M')
-            else:
-                try:
-                    event_dt = datetime.strptime(str(planned_at), '%Y-%m-%d %H:%M:%S')
-                    display_date = event_dt.strftime('%d.%m %H:%M')
-                except:
-                    display_date = str(planned_at).split()[0] if ' ' in str(planned_at) else str(planned_at)
+        response, keyboard = render_events_delete(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
-            keyboard.inline_keyboard.append([InlineKeyboardButton(
-                text=f"{display_date} - {theme[:30]}...", callback_data=f"del_event:{event_id}"
-            )])
 
-        await callback.message.edit_text("🗑️ <b>Выбери событие для удаления:</b>\n\n💕 Выбери то, которое нужно отменить 🌸", reply_markup=keyboard, parse_mode="HTML")
 
-    await callback.answer()
+@router.callback_query(F.data.startswith("events_page:"), IsAdmin())
+async def process_events_page(callback: CallbackQuery):
+    """
+    Handler for ◀️/▶️ navigation in event listings.
+    """
+    view, direction, cursor = parse_page_callback(callback.data)
+    page = await fetch_page(get_events_page_async, cursor, direction)
+    if not page.rows:
+        await callback.message.edit_text("📅 <b>Событий пока нет в расписании</b>\n\n💕 Но скоро появятся интересные мероприятия! 🌟", parse_mode="HTML")
+    else:
+        response, keyboard = EVENT_VIEWS[view](page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.message(Command("send_all"), IsAdmin())
@@ -682,7 +615,7 @@ async def cmd_send_all(message: Message, state: FSMContext, bot: Bot):
     admin_id = message.from_user.id
     admin_username = message.from_user.username or "no_username"
 
-    logger.info(f"Admin {admin_id} (@{admin_username}) initiated broadcast message")
+    logger.info("Admin %s (@%s) initiated broadcast message", admin_id, admin_username)
 
     await message.reply("💌 <b>Сообщение для всех участниц</b>\n\n✨ Напиши что-то теплое и вдохновляющее для нашего клуба! 💕\n\nВсе получат твое послание с любовью! 🌸", parse_mode="HTML")
     await state.set_state(SendAllStates.waiting_for_message)
@@ -694,62 +627,58 @@ async def process_send_all(message: Message, state: FSMContext, bot: Bot):
     admin_username = message.from_user.username or "no_username"
     text = message.text
 
-    logger.info(f"Admin {admin_id} (@{admin_username}) sending broadcast message")
-
-    user_ids = get_all_user_ids_by_role('user')
-    sent_count = 0
-    failed_count = 0
+    logger.info("Admin %s (@%s) sending broadcast message", admin_id, admin_username)
 
-    for user_id in user_ids:
-        try:
-            await bot.send_message(user_id, text)
-            sent_count += 1
-        except Exception as e:
-            failed_count += 1
-            logger.warning(f"Failed to send broadcast to user {user_id}: {e}")
-
-    logger.info(f"Broadcast completed: {sent_count} successful, {failed_count} failed, total users: {len(user_ids)}")
+    user_ids = await get_all_user_ids_by_role_async('user')
+    progress = await message.reply(f"📤 <b>Рассылка запущена</b>\n\n👥 Получательниц: {len(user_ids)}", parse_mode="HTML")
+    broadcast = await broadcast_engine.enqueue(
+        bot, 'broadcast', user_ids, text,
+        created_by=admin_id,
+        progress_chat_id=progress.chat.id,
+        progress_message_id=progress.message_id
+    )
+    await progress.edit_reply_markup(reply_markup=progress_keyboard(broadcast))
 
-    await message.reply(f"💌 <b>Сообщение отправлено!</b>\n\n✨ Дошло до {sent_count} из {len(user_ids)} участниц\n\n💕 Спасибо, что заботишься о нашем клубе! 🌸", parse_mode="HTML")
     await message.answer("⬅️ Возвращаемся в меню. Нажми кнопку ниже или команду /menu.", reply_markup=InlineKeyboardMarkup(
         inline_keyboard=[[InlineKeyboardButton(text="⬅️ Главное меню", callback_data="menu:back_to_main")]]
     ), parse_mode="HTML")
     await state.clear()
 
 
+@router.callback_query(F.data.startswith("broadcast_cancel:"), IsAdmin(), flags={"callback_answer": {"pre": False}})
+async def process_cancel_broadcast(callback: CallbackQuery, callback_answer: CallbackAnswer):
+    broadcast_id = int(callback.data.split(":")[1])
+    if await broadcast_engine.cancel(broadcast_id):
+        logger.info("Admin %s cancelled broadcast %s", callback.from_user.id, broadcast_id)
+        callback_answer.text = "Рассылка останавливается..."
+    else:
+        callback_answer.text = "Рассылка уже завершена"
+        callback_answer.show_alert = True
+
+
 @router.message(Command("delete_event"), IsAdmin())
 async def cmd_delete_event(message: Message):
-    events = get_all_events()
-    if not events:
+    page = await fetch_page(get_events_page_async)
+    if not page.rows:
         await message.reply("📅 <b>Все события в расписании!</b>\n\n💕 Пока нет событий для удаления 🌸", parse_mode="HTML")
         return
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-    for event_id, planned_at, theme, place in events:
-        keyboard.inline_keyboard.append([InlineKeyboardButton(
-            text=f"{planned_at} - {theme}", callback_data=f"del_event:{event_id}"
-        )])
-    await message.reply("🗑️ <b>Выбери событие для удаления:</b>\n\n💕 Выбери то, которое нужно отменить 🌸", reply_markup=keyboard, parse_mode="HTML")
+    response, keyboard = render_events_delete(page)
+    await message.reply(response, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("del_event:"))
-async def process_delete_event(callback: CallbackQuery):
+async def process_delete_event(callback: CallbackQuery, is_admin: bool):
     event_id = int(callback.data.split(":")[1])
-    if delete_event(event_id):
-        await callback.message.edit_text("✅ <b>Событие отменено</b>\n\n💕 Участницы будут оповещены об изменениях 🌸", parse_mode="HTML")
-
-        # Return to main menu after successful deletion
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+    if await delete_event_async(event_id):
+        await show_with_menu(callback.message, "✅ <b>Событие отменено</b>\n\n💕 Участницы будут оповещены об изменениях 🌸", is_admin, edit=True)
     else:
         await callback.message.edit_text("💔 <b>Ой, не получилось отменить событие</b>\n\n❌ Попробуй еще раз или обратись к администратору 💕", parse_mode="HTML")
-    await callback.answer()
 
 
 # === ANONYMOUS MESSAGES MANAGEMENT ===
 
 @router.message(Command("manage_anonymous"), IsAdmin())
-async def cmd_manage_anonymous(message: Message):
+async def cmd_manage_anonymous(message: Message, edit: bool = False):
     """
     Handler for the /manage_anonymous command. Shows anonymous message management options.
     """
@@ -758,11 +687,28 @@ async def cmd_manage_anonymous(message: Message):
         [InlineKeyboardButton(text="🗑️ Удалить сообщения", callback_data="anon:delete")]
     ])
 
-    await message.reply(
-        "💌 <b>Управление анонимными сообщениями</b>\n\n💕 Выбери, что хочешь сделать с сообщениями участниц ✨",
-        reply_markup=keyboard,
-        parse_mode="HTML"
-    )
+    await present(message, "💌 <b>Управление анонимными сообщениями</b>\n\n💕 Выбери, что хочешь сделать с сообщениями участниц ✨", keyboard, edit=edit)
+
+
+def render_anonymous_list(page: Page) -> tuple:
+    buttons = []
+    for msg_id, user_id, message_text, created_at, reply, replied_by, replied_at in page.rows:
+        # Truncate message for display
+        display_text = message_text[:40] + "..." if len(message_text) > 40 else message_text
+        status = "✅ Отвечено" if reply else "⏳ Ожидает ответа"
+        buttons.append(InlineKeyboardButton(text=f"💌 {display_text} - {status}", callback_data=f"anon_view:{msg_id}"))
+    return "📨 <b>Все анонимные сообщения:</b>\n\n💕 Нажми на сообщение, чтобы просмотреть или ответить ✨", paged_keyboard(buttons, "anon_page", "list", page)
+
+
+def render_anonymous_delete(page: Page) -> tuple:
+    buttons = []
+    for msg_id, user_id, message_text, created_at, reply, replied_by, replied_at in page.rows:
+        display_text = message_text[:30] + "..." if len(message_text) > 30 else message_text
+        buttons.append(InlineKeyboardButton(text=f"🗑️ {display_text}", callback_data=f"anon_del:{msg_id}"))
+    return "🗑️ <b>Выбери сообщение для удаления:</b>\n\n💕 Выбери то, которое нужно удалить 🌸", paged_keyboard(buttons, "anon_page", "del", page)
+
+
+ANONYMOUS_VIEWS = {"list": render_anonymous_list, "del": render_anonymous_delete}
 
 
 @router.callback_query(F.data.startswith("anon:"))
@@ -773,57 +719,50 @@ async def process_anonymous_management(callback: CallbackQuery, state: FSMContex
     action = callback.data.split(":")[1]
 
     if action == "list":
-        messages = get_all_anonymous_messages()
-        if not messages:
+        page = await fetch_page(get_anonymous_messages_page_async)
+        if not page.rows:
             await callback.message.edit_text("📨 <b>Анонимных сообщений пока нет</b>\n\n💕 Участницы еще не отправляли анонимные послания ✨", parse_mode="HTML")
             return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-        for msg_id, user_id, message_text, created_at, reply, replied_by, replied_at in messages:
-            # Truncate message for display
-            display_text = message_text[:40] + "..." if len(message_text) > 40 else message_text
-            status = "✅ Отвечено" if reply else "⏳ Ожидает ответа"
-
-            keyboard.inline_keyboard.append([
-                InlineKeyboardButton(
-                    text=f"💌 {display_text} - {status}",
-                    callback_data=f"anon_view:{msg_id}"
-                )
-            ])
-
-        await callback.message.edit_text("📨 <b>Все анонимные сообщения:</b>\n\n💕 Нажми на сообщение, чтобы просмотреть или ответить ✨", reply_markup=keyboard, parse_mode="HTML")
+        response, keyboard = render_anonymous_list(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
     elif action == "delete":
-        messages = get_all_anonymous_messages()
-        if not messages:
+        page = await fetch_page(get_anonymous_messages_page_async)
+        if not page.rows:
             await callback.message.edit_text("🗑️ <b>Сообщений для удаления нет</b>\n\n💕 Все сообщения в безопасности! 🌸", parse_mode="HTML")
             return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[])
-        for msg_id, user_id, message_text, created_at, reply, replied_by, replied_at in messages:
-            display_text = message_text[:30] + "..." if len(message_text) > 30 else message_text
-            keyboard.inline_keyboard.append([
-                InlineKeyboardButton(
-                    text=f"🗑️ {display_text}",
-                    callback_data=f"anon_del:{msg_id}"
-                )
-            ])
+        response, keyboard = render_anonymous_delete(page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
-        await callback.message.edit_text("🗑️ <b>Выбери сообщение для удаления:</b>\n\n💕 Выбери то, которое нужно удалить 🌸", reply_markup=keyboard, parse_mode="HTML")
 
-    await callback.answer()
+
+@router.callback_query(F.data.startswith("anon_page:"), IsAdmin())
+async def process_anonymous_page(callback: CallbackQuery):
+    """
+    Handler for ◀️/▶️ navigation in anonymous message listings.
+    """
+    view, direction, cursor = parse_page_callback(callback.data)
+    page = await fetch_page(get_anonymous_messages_page_async, cursor, direction)
+    if not page.rows:
+        await callback.message.edit_text("📨 <b>Анонимных сообщений пока нет</b>\n\n💕 Участницы еще не отправляли анонимные послания ✨", parse_mode="HTML")
+    else:
+        response, keyboard = ANONYMOUS_VIEWS[view](page)
+        await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
 
 
-@router.callback_query(F.data.startswith("anon_view:"))
-async def process_view_anonymous_message(callback: CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.startswith("anon_view:"), flags={"callback_answer": {"pre": False}})
+async def process_view_anonymous_message(callback: CallbackQuery, state: FSMContext, callback_answer: CallbackAnswer):
     """
     Handler for viewing and replying to anonymous messages.
     """
     message_id = int(callback.data.split(":")[1])
-    message_data = get_anonymous_message_by_id(message_id)
+    message_data = await get_anonymous_message_by_id_async(message_id)
 
     if not message_data:
-        await callback.answer("Сообщение не найдено", show_alert=True)
+        callback_answer.text = "Сообщение не найдено"
+        callback_answer.show_alert = True
         return
 
     response = f"💌 <b>Анонимное сообщение #{message_data['id']}</b>\n\n"
@@ -847,7 +786,6 @@ async def process_view_anonymous_message(callback: CallbackQuery, state: FSMCont
         ])
 
     await callback.message.edit_text(response, reply_markup=keyboard, parse_mode="HTML")
-    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("anon_reply:"))
@@ -866,11 +804,10 @@ async def process_reply_anonymous_message(callback: CallbackQuery, state: FSMCon
     )
 
     await state.set_state(AnonymousStates.waiting_for_reply)
-    await callback.answer()
 
 
 @router.message(AnonymousStates.waiting_for_reply)
-async def process_anonymous_reply(message: Message, state: FSMContext, bot: Bot):
+async def process_anonymous_reply(message: Message, state: FSMContext, bot: Bot, is_admin: bool):
     """
     Handler for processing admin reply to anonymous message.
     """
@@ -885,23 +822,18 @@ async def process_anonymous_reply(message: Message, state: FSMContext, bot: Bot)
     reply_text = message.text.strip()
 
     # Save reply to database
-    if reply_to_anonymous_message(message_id, reply_text, message.from_user.id):
+    if await reply_to_anonymous_message_async(message_id, reply_text, message.from_user.id):
         # Get original message to find user
-        original_message = get_anonymous_message_by_id(message_id)
+        original_message = await get_anonymous_message_by_id_async(message_id)
         if original_message:
             try:
                 # Send reply to the original user
                 user_response = f"💌 <b>Ответ на ваше анонимное послание</b>\n\n💕 Администратор прочитал ваше сообщение и ответил:\n\n💭 <i>{reply_text}</i>\n\n✨ Спасибо, что доверяете нам! 🌸"
                 await bot.send_message(original_message['user_id'], user_response, parse_mode="HTML")
             except Exception as e:
-                logger.warning(f"Failed to send reply to user {original_message['user_id']}: {e}")
+                logger.warning("Failed to send reply to user %s: %s", original_message['user_id'], e)
 
-        await message.reply("✅ <b>Ответ отправлен!</b>\n\n💕 Участница получила ваш теплый ответ ✨", parse_mode="HTML")
-
-        # Return to main menu
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(message)
-        await send_main_menu(message, is_admin)
+        await show_with_menu(message, "✅ <b>Ответ отправлен!</b>\n\n💕 Участница получила ваш теплый ответ ✨", is_admin)
     else:
         await message.reply("💔 <b>Ошибка при сохранении ответа</b>\n\n❌ Попробуйте еще раз 💕", parse_mode="HTML")
 
@@ -909,20 +841,14 @@ async def process_anonymous_reply(message: Message, state: FSMContext, bot: Bot)
 
 
 @router.callback_query(F.data.startswith("anon_del:"))
-async def process_delete_anonymous_message(callback: CallbackQuery):
+async def process_delete_anonymous_message(callback: CallbackQuery, is_admin: bool):
     """
     Handler for deleting anonymous messages.
     """
     message_id = int(callback.data.split(":")[1])
 
-    if delete_anonymous_message(message_id):
-        await callback.message.edit_text("✅ <b>Анонимное сообщение удалено</b>\n\n💕 Сообщение успешно удалено из системы 🌸", parse_mode="HTML")
-
-        # Return to main menu after successful deletion
-        from handlers.user import is_admin_user, send_main_menu
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+    if await delete_anonymous_message_async(message_id):
+        await show_with_menu(callback.message, "✅ <b>Анонимное сообщение удалено</b>\n\n💕 Сообщение успешно удалено из системы 🌸", is_admin, edit=True)
     else:
         await callback.message.edit_text("💔 <b>Ошибка при удалении</b>\n\n❌ Не удалось удалить сообщение 💕", parse_mode="HTML")
 
-    await callback.answer()
@@ -0,0 +1,106 @@
+import os
+from typing import Optional
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+# Callbacks edit the message they came from in both modes. "single": results carry the
+# menu keyboard; "classic": results are followed by a separate menu message
+NAV_MODE = os.getenv('NAV_MODE', 'single').lower()
+
+MAIN_MENU_TEXT = (
+    "✨ <b>Выбери, что хочешь сделать:</b>\n\n"
+    "• Получи вдохновение\n"
+    "• Узнай о предстоящих событиях\n"
+    "• Отправь анонимное послание\n"
+    "• Посмотри доступные возможности\n"
+)
+
+user_commands = [
+    types.BotCommand(command="start", description="Запустить бота"),
+    types.BotCommand(command="help", description="Показать доступные команды"),
+    types.BotCommand(command="motivation", description="Получить вдохновение"),
+    types.BotCommand(command="events", description="Посмотреть предстоящие события"),
+    types.BotCommand(command="anonymous_message", description="Отправить анонимное сообщение"),
+]
+admin_commands = user_commands + [
+    types.BotCommand(command="manage_quotes", description="Управление цитатами"),
+    types.BotCommand(command="manage_photos", description="Управление фотографиями"),
+    types.BotCommand(command="manage_events", description="Управление событиями"),
+    types.BotCommand(command="manage_anonymous", description="Управление анонимными сообщениями"),
+    types.BotCommand(command="send_all", description="Отправить всем")
+]
+
+
+def build_main_menu(is_admin: bool) -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton(text="💖 Вдохновение", callback_data="menu:motivation")],
+        [InlineKeyboardButton(text="📅 События", callback_data="menu:events")],
+        [InlineKeyboardButton(text="💌 Анонимное послание", callback_data="menu:anonymous")],
+        [InlineKeyboardButton(text="ℹ️ Помощь", callback_data="menu:help")],
+    ]
+    if is_admin:
+        keyboard.extend([
+            [InlineKeyboardButton(text="💭 Управление цитатами", callback_data="menu_admin:quotes")],
+            [InlineKeyboardButton(text="📸 Управление фотографиями", callback_data="menu_admin:photos")],
+            [InlineKeyboardButton(text="🎉 Управление событиями", callback_data="menu_admin:events")],
+            [InlineKeyboardButton(text="💌 Анонимные сообщения", callback_data="menu_admin:anonymous")],
+            [InlineKeyboardButton(text="📢 Рассылка участницам", callback_data="menu_admin:broadcast")],
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+async def edit_or_answer(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                         parse_mode: Optional[str] = "HTML") -> None:
+    """
+    Edit one of the bot's own messages in place, or send a new one when it cannot be
+    edited (e.g. it is a photo or too old).
+    """
+    try:
+        await message.edit_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return
+        await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
+
+
+async def present(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None,
+                  edit: bool = False, parse_mode: Optional[str] = "HTML") -> None:
+    """
+    Show a screen: in place of `message` when navigating by callback, otherwise as a reply.
+    """
+    if edit:
+        await edit_or_answer(message, text, reply_markup, parse_mode)
+    else:
+        await message.reply(text, reply_markup=reply_markup, parse_mode=parse_mode)
+
+
+async def send_main_menu(message: Message, is_admin: bool, edit: bool = False) -> None:
+    if edit:
+        await edit_or_answer(message, MAIN_MENU_TEXT, build_main_menu(is_admin))
+    else:
+        await message.answer(MAIN_MENU_TEXT, reply_markup=build_main_menu(is_admin), parse_mode="HTML")
+
+
+async def show_with_menu(message: Message, text: str, is_admin: bool, edit: bool = False,
+                         parse_mode: Optional[str] = "HTML") -> None:
+    """
+    Show the result of an action followed by the main menu, in place of `message` when
+    `edit` is set. In single mode this is one message carrying the menu keyboard; in
+    classic mode the result loses its keyboard and a new menu message follows it, so
+    no stale menu is left behind.
+    """
+    if NAV_MODE == 'single':
+        await present(message, text, build_main_menu(is_admin), edit, parse_mode)
+        return
+
+    await present(message, text, None, edit, parse_mode)
+    await send_main_menu(message, is_admin)
+
+
+def append_back_button(keyboard: InlineKeyboardMarkup, target: str = "back_to_main") -> InlineKeyboardMarkup:
+    keyboard.inline_keyboard.append(
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data=f"menu:{target}")]
+    )
+    return keyboard
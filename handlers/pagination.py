@@ -0,0 +1,66 @@
+from typing import NamedTuple, Optional
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+PAGE_SIZE = 10
+
+FORWARD = "n"
+BACKWARD = "p"
+
+
+class Page(NamedTuple):
+    rows: list
+    has_prev: bool
+    has_next: bool
+
+
+async def fetch_page(fetch_page_async, cursor: Optional[int] = None, direction: str = FORWARD,
+                     limit: int = PAGE_SIZE) -> Page:
+    """
+    Fetch one page through a keyset `get_*_page_async(after_id, limit, backward)` function.
+    One extra row is requested to find out whether the listing continues.
+    Falls back to the first page when the cursor row no longer exists.
+    """
+    backward = direction == BACKWARD
+    rows = await fetch_page_async(cursor, limit + 1, backward)
+
+    if cursor is not None and not rows:
+        return await fetch_page(fetch_page_async, limit=limit)
+
+    if backward:
+        has_more = len(rows) > limit
+        return Page(rows[-limit:], has_more, True)
+
+    has_more = len(rows) > limit
+    return Page(rows[:limit], cursor is not None, has_more)
+
+
+def parse_page_callback(data: str) -> tuple:
+    """
+    Split `<prefix>:<view>:<direction>:<cursor>` callback data into (view, direction, cursor).
+    """
+    _, view, direction, cursor = data.split(":")
+    return view, direction, int(cursor)
+
+
+def page_navigation_row(prefix: str, view: str, page: Page) -> list:
+    """
+    Build the ◀️/▶️ row for a page; the first and last row IDs of the page are the cursors.
+    """
+    row = []
+    if page.has_prev:
+        row.append(InlineKeyboardButton(text="◀️", callback_data=f"{prefix}:{view}:{BACKWARD}:{page.rows[0][0]}"))
+    if page.has_next:
+        row.append(InlineKeyboardButton(text="▶️", callback_data=f"{prefix}:{view}:{FORWARD}:{page.rows[-1][0]}"))
+    return row
+
+
+def paged_keyboard(buttons: list, prefix: str, view: str, page: Page) -> InlineKeyboardMarkup:
+    """
+    Wrap one button row per item with the page navigation row.
+    """
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[[button] for button in buttons])
+    navigation = page_navigation_row(prefix, view, page)
+    if navigation:
+        keyboard.inline_keyboard.append(navigation)
+    return keyboard
@@ -1,19 +1,21 @@
-from datetime import datetime
+import html
 
 from aiogram import Bot, Router, types, F
 from aiogram.filters import CommandStart, Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import BotCommandScopeChat, Message, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
-from typing import Union, Optional
-
-from database.anonymous import add_anonymous_message
-from database.events import get_all_events
-from database.photos import get_random_photo
-from database.quotes import get_random_quote
-from database.users import add_user, get_all_user_ids_by_role
-from filters import IsAdmin, ADMIN_IDS
+from aiogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
+from aiogram.utils.callback_answer import CallbackAnswer
+
+from bot_commands import ensure_admin_commands
+from database.anonymous import add_anonymous_message_async
+from database.events import get_event_feed_pages_async
+from database.photos import deal_photo_async
+from database.quotes import get_random_quote_async
+from database.users import get_all_user_ids_by_role_async
 from logging_config import get_logger
 from states.anonymous import AnonymousStates
+from filters import IsAdmin
+from handlers.menu import NAV_MODE, append_back_button, build_main_menu, present, send_main_menu, show_with_menu, user_commands
 from handlers.admin import (
     cmd_manage_quotes,
     cmd_manage_photos,
@@ -24,112 +26,36 @@ from handlers.admin import (
 
 logger = get_logger(__name__)
 
-router = Router()
-
-user_commands = [
-    types.BotCommand(command="start", description="Запустить бота"),
-    types.BotCommand(command="help", description="Показать доступные команды"),
-    types.BotCommand(command="motivation", description="Получить вдохновение"),
-    types.BotCommand(command="events", description="Посмотреть предстоящие события"),
-    types.BotCommand(command="anonymous_message", description="Отправить анонимное сообщение"),
-]
-admin_commands = user_commands + [
-    types.BotCommand(command="manage_quotes", description="Управление цитатами"),
-    types.BotCommand(command="manage_photos", description="Управление фотографиями"),
-    types.BotCommand(command="manage_events", description="Управление событиями"),
-    types.BotCommand(command="manage_anonymous", description="Управление анонимными сообщениями"),
-    types.BotCommand(command="send_all", description="Отправить всем")
-]
-
-
-def build_main_menu(is_admin: bool) -> InlineKeyboardMarkup:
-    keyboard = [
-        [InlineKeyboardButton(text="💖 Вдохновение", callback_data="menu:motivation")],
-        [InlineKeyboardButton(text="📅 События", callback_data="menu:events")],
-        [InlineKeyboardButton(text="💌 Анонимное послание", callback_data="menu:anonymous")],
-        [InlineKeyboardButton(text="ℹ️ Помощь", callback_data="menu:help")],
-    ]
-    if is_admin:
-        keyboard.extend([
-            [InlineKeyboardButton(text="💭 Управление цитатами", callback_data="menu_admin:quotes")],
-            [InlineKeyboardButton(text="📸 Управление фотографиями", callback_data="menu_admin:photos")],
-            [InlineKeyboardButton(text="🎉 Управление событиями", callback_data="menu_admin:events")],
-            [InlineKeyboardButton(text="💌 Анонимные сообщения", callback_data="menu_admin:anonymous")],
-            [InlineKeyboardButton(text="📢 Рассылка участницам", callback_data="menu_admin:broadcast")],
-        ])
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
-
-
-async def send_main_menu(message: Message, is_admin: bool) -> None:
-    await message.answer(
-        "✨ <b>Выбери, что хочешь сделать:</b>\n\n"
-        "• Получи вдохновение\n"
-        "• Узнай о предстоящих событиях\n"
-        "• Отправь анонимное послание\n"
-        "• Посмотри доступные возможности\n",
-        reply_markup=build_main_menu(is_admin),
-        parse_mode="HTML"
-    )
-
-
-def append_back_button(keyboard: InlineKeyboardMarkup, target: str = "back_to_main") -> InlineKeyboardMarkup:
-    keyboard.inline_keyboard.append(
-        [InlineKeyboardButton(text="⬅️ Назад", callback_data=f"menu:{target}")]
-    )
-    return keyboard
+router = Router(name="user")
 
+MESSAGE_LIMIT = 4096
+# Keeps a single event well inside one message even with a very long theme or place
+EVENT_FIELD_LIMIT = 1000
 
-async def is_admin_user(event: Union[Message, CallbackQuery]) -> bool:
-    try:
-        if isinstance(event, CallbackQuery):
-            user_id = event.from_user.id
-        else:
-            user_id = event.from_user.id
-        return user_id in ADMIN_IDS
-    except Exception:
-        return False
 
 @router.message(CommandStart())
-async def send_welcome(message: types.Message, bot: Bot):
+async def send_welcome(message: types.Message, bot: Bot, is_admin: bool):
     """
     Handler for the /start command. This is for all users.
+    Registration happens in UserContextMiddleware.
     """
     user_id = message.from_user.id
     username = message.from_user.username or "no_username"
 
-    logger.info(f"User {user_id} (@{username}) started the bot")
-
-    await message.reply("🌸 Привет, дорогая! 🌸\n\nДобро пожаловать в наш уютный GirlClub! 💖\nЗдесь мы делимся вдохновением и поддержкой! ✨")
-
-    admin_command = IsAdmin()
-    is_admin = await admin_command(message)
-    role = 'admin' if is_admin else 'user'
-
-    if add_user(user_id, message.from_user.username, message.from_user.first_name, role):
-        logger.info(f"New user registered: {user_id} (@{username}) as {role}")
-    else:
-        logger.debug(f"Existing user accessed bot: {user_id} (@{username})")
+    logger.info("User %s (@%s) started the bot", user_id, username, extra={'event': 'start', 'user_id': user_id})
 
     if is_admin:
-        await bot.set_my_commands(admin_commands, scope=BotCommandScopeChat(chat_id=message.chat.id))
-        logger.debug(f"Admin commands set for user {user_id}")
-    else:
-        await bot.set_my_commands(user_commands, scope=BotCommandScopeChat(chat_id=message.chat.id))
-        logger.debug(f"User commands set for user {user_id}")
+        await ensure_admin_commands(bot, message.chat.id)
 
-    await send_main_menu(message, is_admin)
+    await show_with_menu(message, "🌸 Привет, дорогая! 🌸\n\nДобро пожаловать в наш уютный GirlClub! 💖\nЗдесь мы делимся вдохновением и поддержкой! ✨",
+                         is_admin, parse_mode=None)
 
 
 @router.message(Command("help"))
-async def send_help(message: types.Message, bot: Bot, is_admin_override: Optional[bool] = None):
+async def send_help(message: types.Message, is_admin: bool, edit: bool = False):
     """
     Handler for the /help command. Shows available commands based on user role.
     """
-    if is_admin_override is not None:
-        is_admin = is_admin_override
-    else:
-        is_admin = await is_admin_user(message)
-
     help_text = "🌸 <b>Дорогая, вот что я умею для тебя:</b> ✨\n\n"
 
     if is_admin:
@@ -153,26 +79,24 @@ async def send_help(message: types.Message, bot: Bot, is_admin_override: Optiona
 
         help_text += "\n💖 <i>Я здесь, чтобы поддерживать и вдохновлять тебя! 🌸</i>"
 
-    await message.reply(help_text, parse_mode="HTML")
-    await send_main_menu(message, is_admin)
+    await show_with_menu(message, help_text, is_admin, edit=edit)
 
 
 @router.message(Command("menu"))
-async def show_menu(message: Message):
-    admin_command = IsAdmin()
-    is_admin = await admin_command(message)
+async def show_menu(message: Message, is_admin: bool):
     await send_main_menu(message, is_admin)
 
 
 @router.message(Command("motivation"))
-async def cmd_motivation(message: Message):
+async def cmd_motivation(message: Message, edit: bool = False):
     """
     Handler for the /motivation command. Shows options for quotes or photos.
     """
     user_id = message.from_user.id
     username = message.from_user.username or "no_username"
 
-    logger.info(f"User {user_id} (@{username}) requested motivation menu")
+    logger.info("User %s (@%s) requested motivation menu", user_id, username,
+                extra={'event': 'motivation_menu', 'user_id': user_id})
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="💭 Цитата мудрости", callback_data="motivation:quote")],
@@ -180,15 +104,16 @@ async def cmd_motivation(message: Message):
     ])
     append_back_button(keyboard)
 
-    await message.reply(
+    await present(
+        message,
         "🌟 <b>Что тебя вдохновит сегодня?</b>\n\n💕 Выбери, что хочешь получить: мудрую цитату или красивую фотографию ✨",
-        reply_markup=keyboard,
-        parse_mode="HTML"
+        keyboard,
+        edit=edit
     )
 
 
 @router.callback_query(F.data.startswith("motivation:"))
-async def process_motivation_choice(callback: CallbackQuery):
+async def process_motivation_choice(callback: CallbackQuery, is_admin: bool):
     """
     Handler for motivation type selection.
     """
@@ -196,94 +121,102 @@ async def process_motivation_choice(callback: CallbackQuery):
     username = callback.from_user.username or "no_username"
     choice = callback.data.split(":")[1]
 
-    logger.info(f"User {user_id} (@{username}) selected motivation type: {choice}")
+    logger.info("User %s (@%s) selected motivation type: %s", user_id, username, choice,
+                extra={'event': 'motivation_choice', 'user_id': user_id})
 
     if choice == "quote":
-        quote = get_random_quote()
+        quote = await get_random_quote_async()
         if quote:
-            logger.debug(f"Sent quote to user {user_id}")
-            await callback.message.edit_text(
+            logger.debug("Sent quote to user %s", user_id)
+            await show_with_menu(
+                callback.message,
                 f"💖 <b>Мудрая мысль для тебя:</b>\n\n<i>{quote}</i>\n\n✨ Пусть она согреет твое сердце! 🌸",
-                parse_mode="HTML"
+                is_admin,
+                edit=True
             )
         else:
-            logger.warning(f"No quotes available for user {user_id}")
-            await callback.message.edit_text(
+            logger.warning("No quotes available for user %s", user_id)
+            await show_with_menu(
+                callback.message,
                 "💕 <i>Цитат пока нет, но скоро появятся новые вдохновляющие слова!</i> ✨",
-                parse_mode="HTML"
+                is_admin,
+                edit=True
             )
 
     elif choice == "photo":
-        photo = get_random_photo()
+        photo = await deal_photo_async(user_id)
         if not photo:
-            logger.warning(f"No photos available for user {user_id}")
-            await callback.message.edit_text(
+            logger.warning("No photos available for user %s", user_id)
+            await show_with_menu(
+                callback.message,
                 "🌸 <b>Милая, фотографии скоро появятся!</b>\n\n📸 Пока администраторы готовят вдохновляющие картинки для тебя 💖",
-                parse_mode="HTML"
+                is_admin,
+                edit=True
             )
-            is_admin = await is_admin_user(callback)
-            await send_main_menu(callback.message, is_admin)
-            await callback.answer()
             return
 
-        logger.debug(f"Sent photo {photo['id']} to user {user_id}")
+        logger.debug("Sent photo %s to user %s", photo['id'], user_id)
         caption = "💕 <b>Вдохновляющая картинка специально для тебя!</b> ✨"
         if photo['caption']:
             caption += f"\n\n💭 {photo['caption']}"
         caption += "\n\n🌟 Пусть она наполнит тебя силой и красотой!"
 
+        # In single mode the photo itself carries the menu instead of a follow-up message
+        menu = build_main_menu(is_admin) if NAV_MODE == 'single' else None
         await callback.message.delete()
         try:
             await callback.message.answer_photo(
                 photo=photo['file_id'],
                 caption=caption,
+                reply_markup=menu,
                 parse_mode="HTML"
             )
         except Exception as send_err:
             logger.warning(
-                f"Failed to send photo {photo['id']} via photo API, retrying as document. Error: {send_err}"
+                "Failed to send photo %s via photo API, retrying as document. Error: %s", photo['id'], send_err
             )
             await callback.message.answer_document(
                 document=photo['file_id'],
                 caption=caption,
+                reply_markup=menu,
                 parse_mode="HTML"
             )
-
-    is_admin = await is_admin_user(callback)
-    await send_main_menu(callback.message, is_admin)
-    await callback.answer()
+        if NAV_MODE != 'single':
+            await send_main_menu(callback.message, is_admin)
 
 
 @router.message(Command("anonymous_message"))
-async def cmd_anon(message: Message, state: FSMContext):
+async def cmd_anon(message: Message, state: FSMContext, edit: bool = False):
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="menu:cancel_anon")]
         ]
     )
-    await message.reply(
+    await present(
+        message,
         "💌 <b>Анонимное послание</b>\n\nНапиши свои мысли, и они дойдут до администраторов клуба. Мы внимательно прочитаем каждое сообщение! 💕",
-        parse_mode="HTML",
-        reply_markup=keyboard
+        keyboard,
+        edit=edit
     )
     await state.set_state(AnonymousStates.waiting_for_message)
 
 
 @router.message(AnonymousStates.waiting_for_message)
-async def process_anon(message: Message, state: FSMContext, bot: Bot):
+async def process_anon(message: Message, state: FSMContext, bot: Bot, is_admin: bool):
     user_id = message.from_user.id
     username = message.from_user.username or "no_username"
     text = message.text
 
-    logger.info(f"User {user_id} (@{username}) sent anonymous message")
+    logger.info("User %s (@%s) sent anonymous message", user_id, username,
+                extra={'event': 'anonymous_message', 'user_id': user_id})
 
-    if add_anonymous_message(user_id, text):
-        logger.info(f"Anonymous message saved from user {user_id}")
+    if await add_anonymous_message_async(user_id, text):
+        logger.info("Anonymous message saved from user %s", user_id)
     else:
-        logger.error(f"Failed to save anonymous message from user {user_id}")
+        logger.error("Failed to save anonymous message from user %s", user_id)
 
     formatted = f"💌 <b>Новое анонимное послание:</b>\n\n💭 {text}\n\nОт участницы клуба ✨"
-    admin_ids = get_all_user_ids_by_role('admin')
+    admin_ids = await get_all_user_ids_by_role_async('admin')
 
     sent_count = 0
     for admin_id in admin_ids:
@@ -291,94 +224,105 @@ async def process_anon(message: Message, state: FSMContext, bot: Bot):
             await bot.send_message(admin_id, formatted, parse_mode="HTML")
             sent_count += 1
         except Exception as e:
-            logger.error(f"Failed to send anonymous message to admin {admin_id}: {e}")
+            logger.error("Failed to send anonymous message to admin %s: %s", admin_id, e)
 
-    logger.info(f"Anonymous message forwarded to {sent_count}/{len(admin_ids)} admins")
+    logger.info("Anonymous message forwarded to %s/%s admins", sent_count, len(admin_ids))
 
-    await message.reply("💕 <b>Спасибо за твое послание!</b>\n\n✨ Оно отправлено администраторам клуба. Мы ценим твою откровенность и заботу! 🌸", parse_mode="HTML")
-    is_admin = await is_admin_user(message)
-    await send_main_menu(message, is_admin)
+    await show_with_menu(message, "💕 <b>Спасибо за твое послание!</b>\n\n✨ Оно отправлено администраторам клуба. Мы ценим твою откровенность и заботу! 🌸", is_admin)
     await state.clear()
 
 
-@router.message(Command("events"))
-async def get_events(message: Message):
-    events = get_all_events()
+def render_event_feed(events: list[tuple]) -> list[str]:
+    """
+    Render upcoming events into as few messages as fit Telegram's length limit.
+    """
     if not events:
-        await message.reply("🌸 <b>Дорогая, скоро появятся новые события!</b>\n\n📅 Пока администраторы планируют интересные встречи для нашего клуба 💕\n\nСледи за обновлениями! ✨", parse_mode="HTML")
-        is_admin = await is_admin_user(message)
-        await send_main_menu(message, is_admin)
-        return
-
-    intro_message = "🌟 <b>Предстоящие события нашего клуба:</b>\n\n💕 Приходи, будет интересно и тепло! 🌸\n\n"
-    await message.reply(intro_message, parse_mode="HTML")
+        return []
 
+    pages = []
+    page = "🌟 <b>Предстоящие события нашего клуба:</b>\n\n💕 Приходи, будет интересно и тепло! 🌸"
     for _, planned_at, place, theme in events:
-        if isinstance(planned_at, datetime):
-            formatted_date = planned_at.strftime('%d.%m.%Y в %H:%M')
+        entry = (f"🎉 <b>{html.escape(theme[:EVENT_FIELD_LIMIT])}</b>\n"
+                 f"📅 {planned_at.strftime('%d.%m.%Y в %H:%M')}\n"
+                 f"📍 {html.escape(place[:EVENT_FIELD_LIMIT])}")
+        if len(page) + len(entry) + 2 > MESSAGE_LIMIT:
+            pages.append(page)
+            page = entry
         else:
-            try:
-                event_dt = datetime.strptime(str(planned_at), '%Y-%m-%d %H:%M:%S')
-                formatted_date = event_dt.strftime('%d.%m.%Y в %H:%M')
-            except:
-                formatted_date = str(planned_at)
+            page += "\n\n" + entry
 
-        formatted = f"🎉 <b>{theme}</b>\n📅 {formatted_date}\n📍 {place}\n\n✨ Ждем именно тебя!"
-        await message.reply(formatted, parse_mode="HTML")
+    outro = "✨ Ждем именно тебя!"
+    if len(page) + len(outro) + 2 > MESSAGE_LIMIT:
+        pages.append(page)
+        page = outro
+    else:
+        page += "\n\n" + outro
+    pages.append(page)
+    return pages
 
-    is_admin = await is_admin_user(message)
-    await send_main_menu(message, is_admin)
+
+@router.message(Command("events"))
+async def get_events(message: Message, is_admin: bool, edit: bool = False):
+    pages = await get_event_feed_pages_async(render_event_feed)
+    if not pages:
+        await show_with_menu(message, "🌸 <b>Дорогая, скоро появятся новые события!</b>\n\n📅 Пока администраторы планируют интересные встречи для нашего клуба 💕\n\nСледи за обновлениями! ✨", is_admin, edit=edit)
+        return
+
+    *leading, last = pages
+    if leading:
+        await present(message, leading[0], edit=edit)
+        for page in leading[1:]:
+            await message.answer(page, parse_mode="HTML")
+        edit = False
+    await show_with_menu(message, last, is_admin, edit=edit)
 
 
-@router.callback_query(F.data.startswith("menu:"))
-async def process_main_menu_callback(callback: CallbackQuery, state: FSMContext, bot: Bot):
+@router.callback_query(F.data.startswith("menu:"), flags={"callback_answer": {"pre": False}})
+async def process_main_menu_callback(callback: CallbackQuery, state: FSMContext, is_admin: bool,
+                                     callback_answer: CallbackAnswer):
     action = callback.data.split(":")[1]
 
     if action == "motivation":
-        await cmd_motivation(callback.message)
+        await cmd_motivation(callback.message, edit=True)
     elif action == "events":
-        await get_events(callback.message)
+        await get_events(callback.message, is_admin, edit=True)
     elif action == "anonymous":
-        await cmd_anon(callback.message, state)
+        await cmd_anon(callback.message, state, edit=True)
     elif action == "help":
-        is_admin = await is_admin_user(callback)
-        await send_help(callback.message, bot, is_admin_override=is_admin)
+        await send_help(callback.message, is_admin, edit=True)
     elif action == "back_to_main":
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+        await send_main_menu(callback.message, is_admin, edit=True)
     elif action == "cancel_anon":
         await state.clear()
-        await callback.message.answer("❎ <b>Отправка анонимного послания отменена.</b>", parse_mode="HTML")
-        is_admin = await is_admin_user(callback)
-        await send_main_menu(callback.message, is_admin)
+        await show_with_menu(callback.message, "❎ <b>Отправка анонимного послания отменена.</b>", is_admin, edit=True)
     else:
-        await callback.answer("Неизвестная команда меню", show_alert=True)
-        return
-
-    await callback.answer()
+        logger.warning("Unknown main menu action from user %s: %s", callback.from_user.id, action)
+        callback_answer.text = "Неизвестная команда меню"
+        callback_answer.show_alert = True
 
 
-@router.callback_query(F.data.startswith("menu_admin:"))
-async def process_admin_menu_callback(callback: CallbackQuery, state: FSMContext, bot: Bot):
-    is_admin = await is_admin_user(callback)
-    if not is_admin:
-        await callback.answer("Только для администраторов", show_alert=True)
-        return
-
+@router.callback_query(F.data.startswith("menu_admin:"), IsAdmin(), flags={"callback_answer": {"pre": False}})
+async def process_admin_menu_callback(callback: CallbackQuery, state: FSMContext, bot: Bot,
+                                      callback_answer: CallbackAnswer):
     action = callback.data.split(":")[1]
 
     if action == "quotes":
-        await cmd_manage_quotes(callback.message)
+        await cmd_manage_quotes(callback.message, edit=True)
     elif action == "photos":
-        await cmd_manage_photos(callback.message)
+        await cmd_manage_photos(callback.message, edit=True)
     elif action == "events":
-        await cmd_manage_events(callback.message)
+        await cmd_manage_events(callback.message, edit=True)
     elif action == "anonymous":
-        await cmd_manage_anonymous(callback.message)
+        await cmd_manage_anonymous(callback.message, edit=True)
     elif action == "broadcast":
         await cmd_send_all(callback.message, state, bot)
     else:
-        await callback.answer("Неизвестная команда админ-панели", show_alert=True)
-        return
+        logger.warning("Unknown admin menu action from user %s: %s", callback.from_user.id, action)
+        callback_answer.text = "Неизвестная команда админ-панели"
+        callback_answer.show_alert = True
+
 
-    await callback.answer()
+@router.callback_query(F.data.startswith("menu_admin:"), flags={"callback_answer": {"pre": False}})
+async def process_admin_menu_denied(callback: CallbackQuery, callback_answer: CallbackAnswer):
+    callback_answer.text = "Только для администраторов"
+    callback_answer.show_alert = True
@@ -0,0 +1,148 @@
+"""
+Liveness monitoring: an event-loop lag watchdog and the /healthz endpoint.
+
+A heartbeat task measures how late the loop wakes it up. A separate thread
+watches the heartbeat; when the loop has not come back for longer than
+LOOP_STALL_THRESHOLD it logs the loop thread's stack, which points at the
+blocking call.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from aiohttp import web
+
+from database.postgres import ping, run_db
+from jobs import get_scheduler
+from logging_config import get_logger
+from metrics import registry
+
+logger = get_logger(__name__)
+
+LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', '0.5'))
+LOOP_STALL_THRESHOLD = float(os.getenv('LOOP_STALL_THRESHOLD', '0.25'))
+# /healthz fails when the loop has been this late or the database does not answer in time
+HEALTH_MAX_LOOP_LAG = float(os.getenv('HEALTH_MAX_LOOP_LAG', '5'))
+HEALTH_DB_TIMEOUT = float(os.getenv('HEALTH_DB_TIMEOUT', '3'))
+
+LOOP_LAG = registry.histogram(
+    'bot_event_loop_lag_seconds', 'How late the event loop ran the watchdog heartbeat',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = registry.counter('bot_event_loop_stalls_total', 'Times the event loop was blocked past the stall threshold')
+
+
+class LoopWatchdog:
+    """
+    Measure event-loop lag and sample the stack of whatever blocks the loop.
+    The most recent stall samples are kept in `stalls` as (blocked_seconds, stack).
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, threshold: float = LOOP_STALL_THRESHOLD,
+                 max_samples: int = 20):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = deque(maxlen=max_samples)
+        self.last_lag = 0.0
+        self._beat = time.monotonic()
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def seconds_since_beat(self) -> float:
+        return time.monotonic() - self._beat
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.last_lag = max(0.0, now - expected)
+            self._beat = now
+            LOOP_LAG.observe(self.last_lag)
+
+    def _watch(self):
+        sampled_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == sampled_beat:
+                continue
+            # One sample per stall, taken while the loop is still stuck
+            sampled_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = ''.join(traceback.format_stack(frame))
+            self.stalls.append((blocked, stack))
+            LOOP_STALLS.inc()
+            logger.warning("Event loop blocked for over %.2fs, loop thread stack:\n%s", blocked, stack)
+
+
+watchdog = LoopWatchdog()
+
+
+async def _check_database() -> Optional[str]:
+    try:
+        await asyncio.wait_for(run_db(ping), HEALTH_DB_TIMEOUT)
+    except asyncio.TimeoutError:
+        return f"no answer within {HEALTH_DB_TIMEOUT}s"
+    except Exception as e:
+        return str(e).strip()
+    return None
+
+
+def _check_scheduler() -> Optional[str]:
+    return None if get_scheduler().running else "not running"
+
+
+def _check_loop() -> Optional[str]:
+    since_beat = watchdog.seconds_since_beat()
+    if watchdog.running and since_beat > watchdog.interval + HEALTH_MAX_LOOP_LAG:
+        return f"heartbeat {since_beat:.1f}s old"
+    return None
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    checks = {
+        'event_loop': _check_loop(),
+        'database': await _check_database(),
+        'scheduler': _check_scheduler(),
+    }
+    healthy = not any(checks.values())
+    body = {
+        'status': 'ok' if healthy else 'unhealthy',
+        'checks': {name: error or 'ok' for name, error in checks.items()},
+        'loop_lag_seconds': round(watchdog.last_lag, 4),
+        'loop_stalls': len(watchdog.stalls),
+    }
+    return web.json_response(body, status=200 if healthy else 503)
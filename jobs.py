@@ -1,8 +1,15 @@
+import os
+
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.date import DateTrigger
-from datetime import datetime, timedelta
-from database.users import get_all_user_ids_by_role
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
+
+from broadcast import broadcast_engine
+from database.events import claim_due_reminders_async, release_reminders_async
+from database.users import get_all_user_ids_by_role_async, reconcile_role_index_async
+
+ROLE_INDEX_RECONCILE_MINUTES = int(os.getenv('ROLE_INDEX_RECONCILE_MINUTES', '10'))
 
 
 class SchedulerSingleton:
@@ -20,78 +27,109 @@ def get_scheduler() -> AsyncIOScheduler:
     return scheduler_object.scheduler
 
 
-async def send_event_reminder(bot: Bot, theme: str, place: str, event_datetime: str):
+def schedule_maintenance_jobs():
     """
-    Send event reminder to all users 24 hours before the event.
+    Register periodic housekeeping jobs.
     """
-    try:
-        event_dt = datetime.strptime(event_datetime, '%Y-%m-%d %H:%M:%S')
-        event_time = event_dt.strftime('%H:%M')
-        event_date = event_dt.strftime('%d.%m.%Y')
-    except ValueError:
-        event_time = "указанное время"
-        event_date = "указанную дату"
+    scheduler = get_scheduler()
+    scheduler.add_job(
+        reconcile_role_index_async,
+        IntervalTrigger(minutes=ROLE_INDEX_RECONCILE_MINUTES),
+        id="reconcile_role_index",
+        name="Reconcile in-memory role index with users table",
+        replace_existing=True
+    )
 
-    user_ids = get_all_user_ids_by_role('user')
 
-    if not user_ids:
-        print("Warning: No users found to send event reminder to")
-        return
+def parse_offsets(value: str) -> list[int]:
+    """
+    Parse reminder offsets like "7d,24h,1h,30m" into minutes.
+    """
+    units = {'d': 1440, 'h': 60, 'm': 1}
+    offsets = set()
+    for item in value.split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        if item[-1] in units:
+            offsets.add(int(item[:-1]) * units[item[-1]])
+        else:
+            offsets.add(int(item))
+    return sorted(offsets, reverse=True)
+
+
+REMINDER_OFFSETS = parse_offsets(os.getenv('REMINDER_OFFSETS', '7d,24h,1h'))
+REMINDER_TICK_SECONDS = int(os.getenv('REMINDER_TICK_SECONDS', '60'))
 
-    msg = f"📅 <b>Напоминание о событии!</b>\n\n"
-    msg += f"📆 <b>Дата:</b> {event_date}\n"
-    msg += f"⏰ <b>Время:</b> {event_time}\n"
-    msg += f"🎯 <b>Событие:</b> {theme}\n"
-    msg += f"📍 <b>Место:</b> {place}\n\n"
-    msg += f"💪 Не пропустите!"
 
-    sent_count = 0
-    failed_count = 0
+def schedule_reminder_tick(bot: Bot):
+    """
+    Register the periodic tick that sends due event reminders. It also runs once
+    right away, which catches up on reminders missed while the bot was down.
+    """
+    scheduler = get_scheduler()
+    scheduler.add_job(
+        send_due_reminders,
+        IntervalTrigger(seconds=REMINDER_TICK_SECONDS),
+        args=[bot],
+        id="send_due_reminders",
+        name="Send due event reminders",
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+
+def unschedule_reminder_tick():
+    scheduler = get_scheduler()
+    if scheduler.get_job("send_due_reminders"):
+        scheduler.remove_job("send_due_reminders")
+
+
+async def send_due_reminders(bot: Bot):
+    """
+    Claim the reminders that are due and queue one broadcast per event. A claim is
+    released when its broadcast could not be queued, so the next tick retries it.
+    """
+    try:
+        events = await claim_due_reminders_async(REMINDER_OFFSETS)
+    except Exception as e:
+        print(f"Error claiming due reminders: {e}")
+        return
 
-    for uid in user_ids:
+    for event_id, planned_at, place, theme, offset_minutes, claimed_offsets in events:
         try:
-            await bot.send_message(uid, msg, parse_mode="HTML")
-            sent_count += 1
+            await send_event_reminder(bot, planned_at, theme, place)
         except Exception as e:
-            print(f"Failed to send event reminder to user {uid}: {e}")
-            failed_count += 1
-
-    print(f"Event reminder sent: {sent_count} successful, {failed_count} failed")
-    print(f"Event: {theme} at {place} on {event_date} {event_time}")
+            print(f"Error sending reminder for event {event_id}: {e}")
+            try:
+                await release_reminders_async(event_id, claimed_offsets)
+            except Exception as e:
+                print(f"Error releasing reminder claim for event {event_id}: {e}")
 
 
-async def schedule_reminder(bot: Bot, event_datetime: str, event_id: int, theme: str, place: str):
+async def send_event_reminder(bot: Bot, planned_at: datetime, theme: str, place: str):
     """
-    Schedule an event reminder 24 hours before the event.
-    If the event is less than 24 hours away, send immediately.
+    Queue an event reminder to all users for background delivery.
     """
-    try:
-        event_dt = datetime.strptime(event_datetime, '%Y-%m-%d %H:%M:%S')
-        reminder_time = event_dt - timedelta(days=1)
-        now = datetime.now()
+    event_time = planned_at.strftime('%H:%M')
+    event_date = planned_at.strftime('%d.%m.%Y')
 
-        if reminder_time <= now:
-            print(f"Event '{theme}' is scheduled for {event_datetime}, sending immediate reminder")
-            await send_event_reminder(bot, theme, place, event_datetime)
-        else:
-            scheduler = get_scheduler()
-            job_id = f"reminder_{event_id}"
+    user_ids = await get_all_user_ids_by_role_async('user')
 
-            if scheduler.get_job(job_id):
-                scheduler.remove_job(job_id)
+    if not user_ids:
+        print("Warning: No users found to send event reminder to")
+        return
 
-            scheduler.add_job(
-                send_event_reminder,
-                DateTrigger(run_date=reminder_time),
-                args=[bot, theme, place, event_datetime],
-                id=job_id,
-                name=f"Reminder for event: {theme}"
-            )
+    msg = f"📅 <b>Напоминание о событии!</b>\n\n"
+    msg += f"📆 <b>Дата:</b> {event_date}\n"
+    msg += f"⏰ <b>Время:</b> {event_time}\n"
+    msg += f"🎯 <b>Событие:</b> {theme}\n"
+    msg += f"📍 <b>Место:</b> {place}\n\n"
+    msg += f"💪 Не пропустите!"
 
-            reminder_str = reminder_time.strftime('%Y-%m-%d %H:%M:%S')
-            print(f"Scheduled reminder for event '{theme}' at {reminder_str}")
+    broadcast = await broadcast_engine.enqueue(bot, 'reminder', user_ids, msg, "HTML")
 
-    except ValueError as e:
-        print(f"Error parsing event datetime '{event_datetime}': {e}")
-    except Exception as e:
-        print(f"Error scheduling reminder for event '{theme}': {e}")
+    print(f"Event reminder queued as broadcast {broadcast.id} for {broadcast.total} users")
+    print(f"Event: {theme} at {place} on {event_date} {event_time}")
@@ -0,0 +1,110 @@
+"""
+Leader election between replicas on a Postgres session-level advisory lock.
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable
+
+from database.postgres import get_connection, run_db
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Arbitrary application-wide key, distinct from the migration lock
+LEADER_LOCK_KEY = 0x6769726C6C656164
+LEADER_CHECK_INTERVAL = float(os.getenv('LEADER_CHECK_INTERVAL', '5'))
+
+# Detect a dead database connection within about 10 seconds so the lock is
+# released by the server and the old leader steps down at the same time
+KEEPALIVE_OPTIONS = {
+    'keepalives': 1,
+    'keepalives_idle': 5,
+    'keepalives_interval': 2,
+    'keepalives_count': 2,
+    'connect_timeout': 10,
+}
+
+
+class LeaderElector:
+    """
+    Holds the leader lock on a dedicated connection. The lock lives as long as that
+    connection, so when the leader dies Postgres frees it and a follower takes over
+    on its next check. Followers retry every `interval` seconds; the leader checks
+    its connection as often and steps down when it breaks.
+    """
+
+    def __init__(self, on_elected: Callable[[], Awaitable[None]], on_demoted: Callable[[], Awaitable[None]],
+                 interval: float = LEADER_CHECK_INTERVAL):
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._conn = None
+        self._task = None
+
+    def _try_acquire(self) -> bool:
+        if self._conn is None or self._conn.closed:
+            self._conn = get_connection(**KEEPALIVE_OPTIONS)
+            self._conn.autocommit = True
+        cursor = self._conn.cursor()
+        cursor.execute("SELECT pg_try_advisory_lock(%s) AS acquired", (LEADER_LOCK_KEY,))
+        acquired = cursor.fetchone()['acquired']
+        cursor.close()
+        return acquired
+
+    def _check_connection(self):
+        cursor = self._conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+
+    def _disconnect(self):
+        if self._conn is not None and not self._conn.closed:
+            self._conn.close()
+        self._conn = None
+
+    async def start(self):
+        """
+        Run the first election round, then keep checking in the background.
+        """
+        await self._check()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self._check()
+
+    async def _check(self):
+        if self.is_leader:
+            try:
+                await run_db(self._check_connection)
+            except Exception as e:
+                logger.error("Lost leader connection, stepping down: %s", e)
+                await run_db(self._disconnect)
+                self.is_leader = False
+                await self.on_demoted()
+            return
+
+        try:
+            acquired = await run_db(self._try_acquire)
+        except Exception as e:
+            logger.warning("Leader election failed: %s", e)
+            await run_db(self._disconnect)
+            return
+        if acquired:
+            self.is_leader = True
+            logger.info("Elected leader: running scheduled jobs and broadcasts")
+            await self.on_elected()
+
+    async def stop(self):
+        """
+        Give up leadership; closing the connection releases the lock.
+        """
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await self.on_demoted()
+        await run_db(self._disconnect)
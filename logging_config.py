@@ -1,11 +1,193 @@
 """
 Logging configuration for GirlClub Bot
-Provides memory-efficient logging with rotation for limited environments
+Provides memory-efficient logging with rotation for limited environments.
+Records are handed to a background thread through a bounded queue, so formatting,
+writing and rotating log files never happens on the event loop.
 """
 
+import atexit
+import gzip
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+import shutil
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listener = None
+_repeat_filter = None
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line. Fields passed through `extra`
+    (event, user_id, ...) become top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records of high-volume event types, given as
+    {event: rate}. Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Let a warning or error with the same message template through at most once per
+    window. When a window with suppressed repeats closes, a summary record with the
+    count is handed to `emit`, so the count is not lost when the repeats stop.
+    Windows are closed by flush(), which a background thread calls once per window.
+    """
+
+    max_keys = 1000
+
+    def __init__(self, window: float, emit=None):
+        super().__init__()
+        self.window = window
+        self.emit = emit
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.window:
+                seen[1] += 1
+                return False
+            if len(self._seen) >= self.max_keys:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.window}
+            # A copy, so the summary does not pick up the annotation below
+            self._seen[key] = [now, 0, logging.makeLogRecord(vars(record))]
+        if seen is not None and seen[1]:
+            # The window closed but flush() has not reported it yet
+            record.suppressed = seen[1]
+            if isinstance(record.msg, str):
+                record.msg = f"{record.msg} ({seen[1]} similar suppressed)"
+        return True
+
+    def flush(self, force: bool = False):
+        """
+        Emit a summary for every closed window with suppressed repeats, or for all of
+        them when `force` is set.
+        """
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            for key, (first_seen, suppressed, record) in list(self._seen.items()):
+                if not force and now - first_seen < self.window:
+                    continue
+                del self._seen[key]
+                if suppressed:
+                    summaries.append(self._summary(record, suppressed))
+        if self.emit:
+            for summary in summaries:
+                self.emit(summary)
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='log-repeat-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(force=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.window):
+            self.flush()
+
+    @staticmethod
+    def _summary(record: logging.LogRecord, suppressed: int) -> logging.LogRecord:
+        return logging.makeLogRecord(dict(
+            vars(record), msg=f"{record.getMessage()} ({suppressed} similar suppressed)", args=None,
+            exc_info=None, exc_text=None, created=time.time(), suppressed=suppressed
+        ))
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler for a bounded queue. When the queue is full the record is either
+    dropped ('drop') or the logging thread waits for room ('block'). Dropped records
+    are counted and reported by the next record that gets through. Records are
+    queued unformatted and formatted by the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue, policy: str = 'drop'):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.policy == 'block':
+            self.queue.put(record)
+            return
+        try:
+            if self.dropped:
+                self.queue.put_nowait(self._dropped_record())
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record can be handed over as is
+        return record
+
+    def _dropped_record(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"Log queue was full, dropped {self.dropped} records", None, None
+        )
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as plain, gzip.open(dest, 'wb') as compressed:
+        shutil.copyfileobj(plain, compressed)
+    os.remove(source)
 
 
 def setup_logging(
@@ -14,7 +196,13 @@ def setup_logging(
     backup_count: int = 2,
     log_level: int = logging.INFO,
     console_level: int = logging.WARNING,
-    enable_file_logging: bool = True
+    enable_file_logging: bool = True,
+    queue_size: int = 10000,
+    queue_policy: str = 'drop',
+    compress_backups: bool = False,
+    json_format: bool = False,
+    sample_rates: dict = None,
+    repeat_window: float = 0
 ) -> logging.Logger:
     """
     Configure logging for the bot with memory-efficient settings
@@ -26,20 +214,33 @@ def setup_logging(
         log_level: Logging level for file handler
         console_level: Logging level for console handler
         enable_file_logging: Whether to enable file logging (disable for cloud environments)
+        queue_size: Records buffered for the writer thread
+        queue_policy: 'drop' or 'block' when the buffer is full
+        compress_backups: Whether to gzip rotated log files
+        json_format: Whether to write one JSON object per record
+        sample_rates: Fraction of records to keep per `event` type
+        repeat_window: Seconds a repeated warning or error is suppressed for (0 disables)
 
     Returns:
         Configured logger instance
     """
+    global _listener, _repeat_filter
+
+    stop_logging()
 
     logger = logging.getLogger()
     logger.setLevel(log_level)
 
     logger.handlers.clear()
+    handlers = []
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if json_format:
+        formatter = JsonFormatter(datefmt='%Y-%m-%dT%H:%M:%S')
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
     # Add file handler only if enabled (skip for cloud environments)
     if enable_file_logging:
@@ -49,19 +250,58 @@ def setup_logging(
             backupCount=backup_count,
             encoding='utf-8'
         )
+        if compress_backups:
+            file_handler.namer = _gzip_namer
+            file_handler.rotator = _gzip_rotator
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
     # Always add console handler for Railway/cloud visibility
     console_handler = logging.StreamHandler()
     console_handler.setLevel(console_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
+
+    # The handlers above run on the listener thread, including rotation
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = BoundedQueueHandler(log_queue, queue_policy)
+    # Filters run before a record is queued, so discarded records cost almost nothing
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+    if repeat_window > 0:
+        # Summaries skip the filters and go straight to the queue
+        _repeat_filter = RepeatFilter(repeat_window, queue_handler.enqueue)
+        queue_handler.addFilter(_repeat_filter)
+    logger.addHandler(queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    if _repeat_filter is not None:
+        _repeat_filter.start()
 
     return logger
 
 
+def stop_logging():
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _listener, _repeat_filter
+    if _repeat_filter is not None:
+        # Report repeats still being suppressed before the queue is drained
+        _repeat_filter.stop()
+        _repeat_filter = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+# The listener thread is a daemon; flush what is still queued when the process exits
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger instance with the specified name
@@ -104,6 +344,18 @@ LOGGING_PRESETS = {
         'log_level': logging.WARNING,
         'console_level': logging.ERROR,
         'enable_file_logging': True
+    },
+
+    'json': {
+        'log_file': 'girl_club_bot.log',
+        'max_bytes': 5 * 1024 * 1024,
+        'backup_count': 2,
+        'log_level': logging.INFO,
+        'console_level': logging.INFO,
+        'enable_file_logging': False,
+        'json_format': True,
+        'sample_rates': {'motivation_menu': 0.1, 'motivation_choice': 0.1},
+        'repeat_window': 60
     }
 }
 
@@ -114,12 +366,17 @@ def setup_logging_from_env() -> logging.Logger:
     Defaults to cloud preset for Railway/Heroku environments, production otherwise
 
     Environment variables:
-    - LOG_PRESET: development/production/cloud/minimal (default: auto-detect)
+    - LOG_PRESET: development/production/cloud/minimal/json (default: auto-detect)
     - LOG_FILE: custom log file path
     - LOG_LEVEL: DEBUG/INFO/WARNING/ERROR
     - LOG_MAX_BYTES: max bytes per file
     - LOG_BACKUP_COUNT: number of backup files
     - DISABLE_FILE_LOGGING: set to 'true' to disable file logging (for cloud)
+    - LOG_QUEUE_SIZE: records buffered for the writer thread
+    - LOG_QUEUE_POLICY: drop/block when the buffer is full
+    - LOG_COMPRESS_BACKUPS: set to 'true' to gzip rotated files
+    - LOG_SAMPLE_RATES: event=rate pairs, e.g. motivation_menu=0.1,motivation_choice=0.5
+    - LOG_REPEAT_WINDOW: seconds repeated warnings/errors are suppressed for
     """
     # Auto-detect cloud environment
     preset_name = os.getenv('LOG_PRESET')
@@ -166,36 +423,66 @@ def setup_logging_from_env() -> logging.Logger:
     if os.getenv('DISABLE_FILE_LOGGING', '').lower() in ('true', '1', 'yes'):
         config['enable_file_logging'] = False
 
+    if os.getenv('LOG_QUEUE_SIZE'):
+        try:
+            config['queue_size'] = int(os.getenv('LOG_QUEUE_SIZE'))
+        except ValueError:
+            pass
+
+    if os.getenv('LOG_QUEUE_POLICY', '').lower() in ('drop', 'block'):
+        config['queue_policy'] = os.getenv('LOG_QUEUE_POLICY').lower()
+
+    if os.getenv('LOG_COMPRESS_BACKUPS', '').lower() in ('true', '1', 'yes'):
+        config['compress_backups'] = True
+
+    if os.getenv('LOG_SAMPLE_RATES'):
+        rates = dict(config.get('sample_rates') or {})
+        for pair in os.getenv('LOG_SAMPLE_RATES').split(','):
+            event, _, rate = pair.partition('=')
+            try:
+                rates[event.strip()] = float(rate)
+            except ValueError:
+                pass
+        config['sample_rates'] = rates
+
+    if os.getenv('LOG_REPEAT_WINDOW'):
+        try:
+            config['repeat_window'] = float(os.getenv('LOG_REPEAT_WINDOW'))
+        except ValueError:
+            pass
+
     return setup_logging(**config)
 
 
 def log_user_action(logger: logging.Logger, user_id: int, username: str, action: str, details: str = None):
     """Log user actions with consistent format"""
+    extra = {'event': 'user_action', 'user_id': user_id, 'action': action}
     if details:
-        logger.info(f"User {user_id} (@{username}) {action}: {details}")
+        logger.info("User %s (@%s) %s: %s", user_id, username, action, details, extra=extra)
     else:
-        logger.info(f"User {user_id} (@{username}) {action}")
+        logger.info("User %s (@%s) %s", user_id, username, action, extra=extra)
 
 
 def log_admin_action(logger: logging.Logger, admin_id: int, admin_username: str, action: str, target: str = None):
     """Log admin actions with consistent format"""
+    extra = {'event': 'admin_action', 'user_id': admin_id, 'action': action}
     if target:
-        logger.info(f"Admin {admin_id} (@{admin_username}) {action}: {target}")
+        logger.info("Admin %s (@%s) %s: %s", admin_id, admin_username, action, target, extra=extra)
     else:
-        logger.info(f"Admin {admin_id} (@{admin_username}) {action}")
+        logger.info("Admin %s (@%s) %s", admin_id, admin_username, action, extra=extra)
 
 
 def log_system_event(logger: logging.Logger, event: str, details: str = None):
     """Log system events"""
     if details:
-        logger.info(f"System: {event} - {details}")
+        logger.info("System: %s - %s", event, details, extra={'event': 'system'})
     else:
-        logger.info(f"System: {event}")
+        logger.info("System: %s", event, extra={'event': 'system'})
 
 
-def log_error(logger: logging.Logger, error_msg: str, exception: Exception = None):
-    """Log errors with optional exception details"""
+def log_error(logger: logging.Logger, error_msg: str, exception: Exception = None, *args):
+    """Log errors with optional exception details; error_msg is a %-template for args"""
     if exception:
-        logger.error(f"{error_msg}: {str(exception)}")
+        logger.error(error_msg + ": %s", *args, exception)
     else:
-        logger.error(error_msg)
+        logger.error(error_msg, *args)
@@ -2,21 +2,51 @@ import asyncio
 import os
 
 from aiogram import Bot, Dispatcher
-from aiogram.client.session.aiohttp import AiohttpSession
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.utils.callback_answer import CallbackAnswerMiddleware
 from dotenv import load_dotenv
 
-from database.postgres import init_db
+from bot_commands import sync_bot_commands
+from broadcast import broadcast_engine
+from database.events import load_event_feed
+from database.postgres import close_pool, init_db, init_pool
+from database.photos import load_photo_catalog
+from database.quotes import load_quote_corpus
+from database.users import reconcile_role_index
 from handlers.admin import router as admin_router
 from handlers.user import router as user_router
-from jobs import get_scheduler
-from logging_config import setup_logging_from_env
+from health import watchdog
+from jobs import get_scheduler, schedule_maintenance_jobs, schedule_reminder_tick, unschedule_reminder_tick
+from leader import LeaderElector
+from logging_config import setup_logging_from_env, stop_logging
+from metrics import registry
+from middlewares import HandlerMetricsMiddleware, UserContextMiddleware
+from outbound import ScheduledSession
+from storage import FSM_STORAGE, create_storage
+from webhook import BOT_MODE, run_webhook, start_service_server
 
 load_dotenv()
 
 logger = setup_logging_from_env()
 
 
+def create_dispatcher() -> Dispatcher:
+    """
+    Build the dispatcher with its FSM storage, middlewares and routers.
+    """
+    storage = create_storage()
+    dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(UserContextMiddleware())
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    # Answer callback queries before the handler runs so the button spinner stops at once
+    dp.callback_query.middleware(CallbackAnswerMiddleware(pre=True))
+    dp.include_routers(admin_router, user_router)
+
+    registry.gauge('bot_fsm_storage_entries', 'Conversations held in memory by the FSM storage',
+                   lambda: storage.stats()['entries'])
+    return dp
+
+
 async def main():
     api_token = os.getenv("TELEGRAM_API_TOKEN")
     if not api_token:
@@ -25,10 +55,10 @@ async def main():
 
     proxy_url = os.getenv("PROXY_URL")
     if proxy_url:
-        session = AiohttpSession(proxy=proxy_url)
-        logger.info(f"Using proxy: {proxy_url}")
+        session = ScheduledSession(proxy=proxy_url)
+        logger.info("Using proxy: %s", proxy_url)
     else:
-        session = AiohttpSession()
+        session = ScheduledSession()
         logger.info("Running without proxy (local mode)")
 
     bot = Bot(token=api_token, session=session)
@@ -38,28 +68,78 @@ async def main():
     scheduler.start()
     logger.info("Scheduler started")
 
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
-    logger.info("Dispatcher created with memory storage")
-
     try:
-        init_db()
+        applied = init_db()
+        if applied:
+            logger.info("Database migrations applied: %s", applied)
         logger.info("Database initialized successfully")
+        init_pool()
+        logger.info("Database connection pool created")
+        load_quote_corpus()
+        load_photo_catalog()
+        load_event_feed()
+        logger.info("Quote corpus, photo catalog and event feed loaded into memory")
+        reconcile_role_index()
+        logger.info("User role index warmed")
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
 
-    dp.include_routers(admin_router, user_router)
-    logger.info("Routers registered successfully")
+    dp = create_dispatcher()
+    logger.info("Dispatcher created with %s storage", FSM_STORAGE)
+
+    registry.gauge('bot_outbound_queue_depth', 'Telegram requests waiting for their turn to be sent',
+                   lambda: session.scheduler.depth)
+
+    schedule_maintenance_jobs()
+
+    try:
+        applied_scopes = await sync_bot_commands(bot)
+        logger.info("Bot commands registered (%s scopes updated)", applied_scopes)
+    except Exception as e:
+        logger.error("Failed to register bot commands: %s", e)
+
+    # Reminders and broadcast delivery run on one replica only
+    async def on_elected():
+        schedule_reminder_tick(bot)
+        broadcast_engine.start_leading(bot)
+
+    async def on_demoted():
+        unschedule_reminder_tick()
+        broadcast_engine.stop_leading()
+
+    # Started only now: the synchronous startup work above blocks the loop on purpose
+    watchdog.start()
+
+    elector = LeaderElector(on_elected, on_demoted)
+    await elector.start()
+    if not elector.is_leader:
+        logger.info("Another replica is the leader; serving interactive updates only")
 
-    logger.info("Starting polling...")
+    service_runner = None
     try:
-        await dp.start_polling(bot)
+        if BOT_MODE == 'webhook':
+            logger.info("Starting webhook server...")
+            await run_webhook(bot, dp)
+        else:
+            # Health checks and metrics still need a listener on PORT
+            service_runner = await start_service_server()
+            logger.info("Starting polling...")
+            # A webhook left by webhook mode would make getUpdates fail
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
     except Exception as e:
-        logger.error(f"Error during polling: {e}")
+        logger.error("Error while receiving updates: %s", e)
         raise
     finally:
+        if service_runner:
+            await service_runner.cleanup()
+        await elector.stop()
+        await watchdog.stop()
+        # Waits for in-flight database calls, so keep it off the loop
+        await asyncio.to_thread(close_pool)
         logger.info("Bot stopped")
+        stop_logging()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from database.postgres import run_db_in_background
+from database.users import add_user, role_index
+from filters import ADMIN_IDS
+from logging_config import get_logger
+from metrics import registry
+
+logger = get_logger(__name__)
+
+HANDLER_LATENCY = registry.histogram(
+    'bot_handler_seconds', 'Time spent in update handlers', ('router', 'handler', 'status')
+)
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Outer middleware that caps how many updates are processed at the same time.
+    Webhook delivery hands every update to its own task; without a cap a burst of
+    updates would exhaust the database pool and Telegram rate limits at once.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Outer middleware that resolves who sent an update once, from memory, and passes
+    it to filters and handlers as `is_admin`, `role` and `is_registered`.
+    Users missing from the role index (new, or inactive and back again) are
+    registered in the background.
+    """
+
+    def __init__(self):
+        self._registering = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user: User = data.get('event_from_user')
+        if user is None or user.is_bot:
+            data.update(is_admin=False, is_registered=False, role=None)
+            return await handler(event, data)
+
+        is_admin = user.id in ADMIN_IDS
+        role = role_index.role_of(user.id)
+        data['is_admin'] = is_admin
+        data['is_registered'] = role is not None
+        data['role'] = role or ('admin' if is_admin else 'user')
+
+        if role is None and user.id not in self._registering:
+            self._register(user, data['role'])
+        return await handler(event, data)
+
+    def _register(self, user: User, role: str):
+        self._registering.add(user.id)
+        task = run_db_in_background(add_user, user.id, user.username, user.first_name, role)
+
+        def registered(task):
+            self._registering.discard(user.id)
+            if not task.cancelled() and task.exception() is None and task.result():
+                logger.info("New user registered: %s (@%s) as %s", user.id, user.username or 'no_username', role,
+                            extra={'event': 'registration', 'user_id': user.id})
+
+        task.add_done_callback(registered)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware recording how long each handler takes, labelled by router and
+    handler function. Registered on the dispatcher it covers the handlers of every
+    included router.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        router = data.get('event_router')
+        handler_object = data.get('handler')
+        router_name = router.name if router is not None else ''
+        handler_name = handler_object.callback.__name__ if handler_object is not None else ''
+        status = 'error'
+        started = time.perf_counter()
+        try:
+            result = await handler(event, data)
+            status = 'ok'
+            return result
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, router_name, handler_name, status)
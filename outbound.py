@@ -0,0 +1,196 @@
+"""
+Outbound request scheduling for the bot session: every message-sending API call
+waits for a global and a per-chat rate limit, served in priority order.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiogram.methods import EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, EditMessageText, TelegramMethod
+
+from logging_config import get_logger
+from metrics import registry
+
+logger = get_logger(__name__)
+
+API_LATENCY = registry.histogram(
+    'bot_telegram_request_seconds', 'Telegram Bot API call latency, excluding time queued for sending', ('method',)
+)
+API_ERRORS = registry.counter('bot_telegram_errors_total', 'Failed Telegram Bot API calls', ('method', 'code'))
+
+ERROR_CODES = {
+    TelegramBadRequest: '400',
+    TelegramUnauthorizedError: '401',
+    TelegramForbiddenError: '403',
+    TelegramNotFound: '404',
+    TelegramConflictError: '409',
+    TelegramEntityTooLarge: '413',
+    TelegramRetryAfter: '429',
+    TelegramServerError: '5xx',
+}
+
+# Telegram allows about 30 messages per second overall and one per second per chat
+OUTBOUND_RATE = float(os.getenv('OUTBOUND_RATE', '25'))
+OUTBOUND_PER_CHAT_RATE = float(os.getenv('OUTBOUND_PER_CHAT_RATE', '1'))
+OUTBOUND_PER_CHAT_BURST = float(os.getenv('OUTBOUND_PER_CHAT_BURST', '3'))
+OUTBOUND_MAX_RETRIES = int(os.getenv('OUTBOUND_MAX_RETRIES', '3'))
+
+# Priority classes, served lowest first
+INTERACTIVE = 0
+EDIT = 1
+BULK = 2
+
+EDIT_METHODS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption, EditMessageMedia)
+
+# Set to BULK by mass sends; requests without it are classified by their method
+request_priority: ContextVar[Optional[int]] = ContextVar('request_priority', default=None)
+
+
+def priority_of(method: TelegramMethod) -> int:
+    priority = request_priority.get()
+    if priority is not None:
+        return priority
+    return EDIT if isinstance(method, EDIT_METHODS) else INTERACTIVE
+
+
+class OutboundScheduler:
+    """
+    Global token bucket whose tokens go to waiting requests in priority order, plus a
+    token bucket per chat. pause() holds every request, e.g. while flood control is active.
+    """
+
+    def __init__(self, rate: float = OUTBOUND_RATE, per_chat_rate: float = OUTBOUND_PER_CHAT_RATE,
+                 per_chat_burst: float = OUTBOUND_PER_CHAT_BURST):
+        self.rate = rate
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._pump_task = None
+        self._chats = {}
+
+    @property
+    def depth(self) -> int:
+        """
+        Requests waiting for their turn to be sent.
+        """
+        return len(self._waiters)
+
+    async def acquire(self, chat_id, priority: int):
+        delay = self._reserve_chat(chat_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+        await future
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _reserve_chat(self, chat_id) -> float:
+        """
+        Take a token from the chat's bucket, going into debt if it is empty.
+        Returns how long to wait until the reserved token is actually available.
+        """
+        now = time.monotonic()
+        tokens, updated = self._chats.get(chat_id, (self.per_chat_burst, now))
+        tokens = min(self.per_chat_burst, tokens + (now - updated) * self.per_chat_rate) - 1
+        self._chats[chat_id] = (tokens, now)
+
+        if len(self._chats) > 10000:
+            self._chats = {
+                chat: (chat_tokens, at) for chat, (chat_tokens, at) in self._chats.items()
+                if chat_tokens + (now - at) * self.per_chat_rate < self.per_chat_burst
+            }
+        return -tokens / self.per_chat_rate if tokens < 0 else 0.0
+
+    async def _pump(self):
+        while True:
+            if not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # The caller was cancelled while waiting
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+
+class ScheduledSession(AiohttpSession):
+    """
+    AiohttpSession that sends chat-bound requests through an OutboundScheduler, so
+    interactive replies go ahead of progress edits and both go ahead of broadcasts.
+    Flood control (429) pauses all sending and the request is retried.
+    Requests without a chat, such as getUpdates, are sent right away.
+    """
+
+    def __init__(self, scheduler: Optional[OutboundScheduler] = None, max_retries: int = OUTBOUND_MAX_RETRIES,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler or OutboundScheduler()
+        self.max_retries = max_retries
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await self._send(bot, method, timeout)
+
+        priority = priority_of(method)
+        for attempt in range(1, self.max_retries + 1):
+            await self.scheduler.acquire(chat_id, priority)
+            try:
+                return await self._send(bot, method, timeout)
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Flood control on %s, pausing all sends for %ss", method.__api_method__, e.retry_after)
+                self.scheduler.pause(e.retry_after)
+
+    async def _send(self, bot: Bot, method: TelegramMethod, timeout: Optional[int]):
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await super().make_request(bot, method, timeout)
+        except Exception as e:
+            API_ERRORS.inc(api_method, ERROR_CODES.get(type(e), type(e).__name__))
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started, api_method)
@@ -0,0 +1,18 @@
+import os
+
+from aiogram.fsm.storage.base import BaseStorage
+
+from storage.memory import TTLMemoryStorage
+from storage.postgres import PostgresStorage
+
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory').lower()
+
+
+def create_storage() -> BaseStorage:
+    """
+    Build the FSM storage selected by FSM_STORAGE: "memory" (single process, bounded
+    by TTL and size) or "postgres" (shared by all replicas, survives restarts).
+    """
+    if FSM_STORAGE == 'postgres':
+        return PostgresStorage()
+    return TTLMemoryStorage()
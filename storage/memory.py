@@ -0,0 +1,100 @@
+"""
+Bounded in-process FSM storage for single-instance deployments.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+FSM_STATE_TTL = int(os.getenv('FSM_STATE_TTL', str(24 * 60 * 60)))
+FSM_MEMORY_MAX_ENTRIES = int(os.getenv('FSM_MEMORY_MAX_ENTRIES', '10000'))
+
+
+class MemoryRecord:
+    __slots__ = ('state', 'data', 'expires_at')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], expires_at: float):
+        self.state = state
+        self.data = data
+        self.expires_at = expires_at
+
+
+class TTLMemoryStorage(BaseStorage):
+    """
+    Drop-in replacement for MemoryStorage that forgets abandoned flows.
+
+    Every access renews a record's TTL and moves it to the end of the LRU order, so
+    the oldest record is always first: expired records are dropped from the front on
+    each write, and the least recently used one goes when max_entries is exceeded.
+    Empty records are not kept at all.
+    """
+
+    def __init__(self, ttl: int = FSM_STATE_TTL, max_entries: int = FSM_MEMORY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._records = OrderedDict()
+        self.expired_evictions = 0
+        self.lru_evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._records),
+            'expired_evictions': self.expired_evictions,
+            'lru_evictions': self.lru_evictions,
+        }
+
+    def _get(self, key: StorageKey) -> Optional[MemoryRecord]:
+        record = self._records.get(key)
+        if record is None:
+            return None
+        now = time.monotonic()
+        if record.expires_at <= now:
+            del self._records[key]
+            self.expired_evictions += 1
+            return None
+        record.expires_at = now + self.ttl
+        self._records.move_to_end(key)
+        return record
+
+    def _put(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        if state is None and not data:
+            self._records.pop(key, None)
+            return
+        self._records[key] = MemoryRecord(state, data, time.monotonic() + self.ttl)
+        self._records.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._records:
+            key, record = next(iter(self._records.items()))
+            if record.expires_at > now:
+                break
+            del self._records[key]
+            self.expired_evictions += 1
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.lru_evictions += 1
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = self._get(key)
+        self._put(key, state.state if isinstance(state, State) else state, record.data if record else {})
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self._get(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        record = self._get(key)
+        self._put(key, record.state if record else None, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self._get(key)
+        return record.data.copy() if record else {}
+
+    async def close(self) -> None:
+        pass
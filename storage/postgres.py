@@ -0,0 +1,178 @@
+"""
+FSM storage on the bot's Postgres database, shared by all replicas.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from database.fsm import delete_expired_fsm_records_async, load_fsm_record_async, save_fsm_records_async
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Flows untouched for this long are forgotten
+FSM_STATE_TTL = int(os.getenv('FSM_STATE_TTL', str(24 * 60 * 60)))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.5'))
+FSM_CLEANUP_INTERVAL = float(os.getenv('FSM_CLEANUP_INTERVAL', '600'))
+# How long a record read from the database is trusted before it is read again
+FSM_READ_TTL = float(os.getenv('FSM_READ_TTL', '2'))
+
+
+class CachedRecord:
+    __slots__ = ('state', 'data', 'dirty', 'saves_in_flight', 'loaded_at')
+
+    def __init__(self, state: Optional[str], data: Dict[str, Any], loaded_at: float):
+        self.state = state
+        self.data = data
+        self.dirty = False
+        self.saves_in_flight = 0
+        self.loaded_at = loaded_at
+
+    @property
+    def pending(self) -> bool:
+        # Written on this replica and not committed yet, so newer than the database
+        return self.dirty or self.saves_in_flight > 0
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage in the fsm_states table with an in-process write-behind cache.
+
+    Writes land in the cache and are flushed in batches every FSM_FLUSH_INTERVAL
+    seconds, so the set_state/set_data pair of one handler costs a single upsert.
+    This replica's own unsaved writes are always served from the cache; other
+    records are re-read from the database once they are older than read_ttl, so a
+    state written by another replica behind the same load balancer is seen within
+    read_ttl seconds while the get_state aiogram makes on every update stays in memory.
+    Records expire FSM_STATE_TTL seconds after their last write.
+    """
+
+    def __init__(self, ttl: int = FSM_STATE_TTL, flush_interval: float = FSM_FLUSH_INTERVAL,
+                 read_ttl: float = FSM_READ_TTL, key_builder: Optional[KeyBuilder] = None):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.read_ttl = read_ttl
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._cache = {}
+        self._dirty = set()
+        self._flush_task = None
+        self._sweep_at = 1000
+        self._last_cleanup = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._cache),
+            'pending_writes': len(self._dirty),
+        }
+
+    async def _record(self, key: StorageKey) -> tuple:
+        storage_key = self.key_builder.build(key)
+        record = self._cache.get(storage_key)
+        if record and (record.pending or time.monotonic() - record.loaded_at < self.read_ttl):
+            return storage_key, record
+
+        loaded = await load_fsm_record_async(storage_key)
+        # A write may have landed in the cache while the record was loading
+        record = self._cache.get(storage_key)
+        if record and record.pending:
+            return storage_key, record
+        state, data = loaded if loaded else (None, {})
+        now = time.monotonic()
+        if record:
+            # Refresh in place: a handler still holding this record may write to it
+            record.state, record.data, record.loaded_at = state, data, now
+            return storage_key, record
+        record = CachedRecord(state, data, now)
+        self._cache[storage_key] = record
+        if len(self._cache) > self._sweep_at:
+            self._sweep()
+        return storage_key, record
+
+    def _sweep(self):
+        self._cache = {
+            storage_key: record for storage_key, record in self._cache.items() if record.pending
+        }
+        self._sweep_at = max(1000, 2 * len(self._cache))
+
+    def _mark_dirty(self, storage_key: str, record: CachedRecord):
+        record.dirty = True
+        self._dirty.add(storage_key)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """
+        Write all pending changes to the database.
+        """
+        if not self._dirty:
+            return
+        keys, self._dirty = self._dirty, set()
+        records = []
+        deleted_keys = []
+        now = time.monotonic()
+        for storage_key in keys:
+            record = self._cache[storage_key]
+            record.dirty = False
+            record.saves_in_flight += 1
+            if record.state is None and not record.data:
+                deleted_keys.append(storage_key)
+            else:
+                records.append((storage_key, record.state, record.data))
+
+        try:
+            await save_fsm_records_async(records, deleted_keys, self.ttl)
+        except Exception as e:
+            logger.error("Failed to save %s FSM records: %s", len(keys), e)
+            for storage_key in keys:
+                record = self._cache.get(storage_key)
+                if record:
+                    record.saves_in_flight -= 1
+                    record.dirty = True
+                    self._dirty.add(storage_key)
+            return
+        for storage_key in keys:
+            record = self._cache.get(storage_key)
+            if record:
+                record.saves_in_flight -= 1
+
+        if now - self._last_cleanup > FSM_CLEANUP_INTERVAL:
+            self._last_cleanup = now
+            try:
+                expired = await delete_expired_fsm_records_async()
+                if expired:
+                    logger.info("Removed %s expired FSM records", expired)
+            except Exception as e:
+                logger.warning("Failed to remove expired FSM records: %s", e)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key, record = await self._record(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(storage_key, record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, record = await self._record(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        storage_key, record = await self._record(key)
+        record.data = dict(data)
+        self._mark_dirty(storage_key, record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, record = await self._record(key)
+        return record.data.copy()
+
+    async def close(self) -> None:
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
@@ -0,0 +1,15 @@
+from database.events import event_feed
+from database.photos import photo_catalog
+from database.postgres import _function_label
+from database.quotes import quote_corpus
+from database.users import add_user
+
+
+def test_cache_methods_are_labelled_by_their_cache():
+    labels = {_function_label(cache.refresh) for cache in (quote_corpus, photo_catalog, event_feed)}
+
+    assert labels == {'quotes.refresh', 'photos.refresh', 'events.refresh'}
+
+
+def test_functions_are_labelled_by_their_module():
+    assert _function_label(add_user) == 'users.add_user'
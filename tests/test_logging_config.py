@@ -0,0 +1,51 @@
+import logging
+import time
+
+from logging_config import RepeatFilter
+
+
+def _warning(user_id: int) -> logging.LogRecord:
+    return logging.LogRecord('broadcast', logging.WARNING, __file__, 0, "Failed to send to %s: %s",
+                             (user_id, "blocked"), None)
+
+
+def _filter_burst(repeat_filter: RepeatFilter, count: int) -> int:
+    return sum(repeat_filter.filter(_warning(user_id)) for user_id in range(count))
+
+
+def test_summary_is_emitted_when_the_window_closes():
+    emitted = []
+    repeat_filter = RepeatFilter(0.05, emitted.append)
+
+    assert _filter_burst(repeat_filter, 10) == 1
+    repeat_filter.flush()
+    assert emitted == []
+
+    time.sleep(0.06)
+    repeat_filter.flush()
+
+    assert len(emitted) == 1
+    assert emitted[0].suppressed == 9
+    assert emitted[0].getMessage() == "Failed to send to 0: blocked (9 similar suppressed)"
+    assert emitted[0].levelno == logging.WARNING
+
+
+def test_pending_repeats_are_reported_on_stop():
+    emitted = []
+    repeat_filter = RepeatFilter(60, emitted.append)
+    repeat_filter.start()
+
+    _filter_burst(repeat_filter, 5)
+    repeat_filter.stop()
+
+    assert [record.suppressed for record in emitted] == [4]
+
+
+def test_windows_without_repeats_emit_nothing():
+    emitted = []
+    repeat_filter = RepeatFilter(60, emitted.append)
+
+    _filter_burst(repeat_filter, 1)
+    repeat_filter.flush(force=True)
+
+    assert emitted == []
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import handlers.menu
+from handlers.menu import send_main_menu, show_with_menu
+
+
+class FakeMessage:
+    def __init__(self):
+        self.calls = []
+
+    async def edit_text(self, text, reply_markup=None, parse_mode=None):
+        self.calls.append(('edit', text, reply_markup))
+
+    async def answer(self, text, reply_markup=None, parse_mode=None):
+        self.calls.append(('answer', text, reply_markup))
+
+    async def reply(self, text, reply_markup=None, parse_mode=None):
+        self.calls.append(('reply', text, reply_markup))
+
+
+@pytest.mark.parametrize('nav_mode', ['single', 'classic'])
+def test_back_navigation_edits_the_menu_in_place(monkeypatch, nav_mode):
+    monkeypatch.setattr(handlers.menu, 'NAV_MODE', nav_mode)
+    message = FakeMessage()
+
+    asyncio.run(send_main_menu(message, is_admin=False, edit=True))
+
+    assert [call[0] for call in message.calls] == ['edit']
+
+
+def test_single_mode_result_carries_the_menu(monkeypatch):
+    monkeypatch.setattr(handlers.menu, 'NAV_MODE', 'single')
+    message = FakeMessage()
+
+    asyncio.run(show_with_menu(message, "done", is_admin=False, edit=True))
+
+    assert len(message.calls) == 1
+    kind, text, reply_markup = message.calls[0]
+    assert (kind, text) == ('edit', "done")
+    assert reply_markup is not None
+
+
+def test_classic_mode_result_drops_its_keyboard_before_the_new_menu(monkeypatch):
+    monkeypatch.setattr(handlers.menu, 'NAV_MODE', 'classic')
+    message = FakeMessage()
+
+    asyncio.run(show_with_menu(message, "done", is_admin=False, edit=True))
+
+    assert message.calls[0] == ('edit', "done", None)
+    assert message.calls[1][0] == 'answer'
+    assert message.calls[1][2] is not None
+    assert len(message.calls) == 2
@@ -0,0 +1,77 @@
+from database.photos import PhotoCatalog, PhotoDeck, deck_position
+
+
+def _catalog(size: int) -> PhotoCatalog:
+    catalog = PhotoCatalog()
+    with catalog._lock:
+        catalog._replace([{'id': photo_id} for photo_id in range(1, size + 1)])
+        catalog._version = 1
+    return catalog
+
+
+def _deal(catalog: PhotoCatalog, deck, count: int) -> tuple:
+    dealt = []
+    for _ in range(count):
+        photo, deck = catalog.deal(deck)
+        dealt.append(photo['id'])
+    return dealt, deck
+
+
+def test_deck_position_is_a_permutation():
+    for size in (1, 2, 7, 12):
+        assert sorted(deck_position(42, size, cursor) for cursor in range(size)) == list(range(size))
+
+
+def test_a_deck_deals_every_photo_once():
+    catalog = _catalog(7)
+
+    dealt, deck = _deal(catalog, None, 7)
+
+    assert sorted(dealt) == list(range(1, 8))
+    assert deck.cursor == deck.size
+
+
+def test_a_new_deck_does_not_start_with_the_last_photo():
+    catalog = _catalog(3)
+
+    for _ in range(50):
+        dealt, deck = _deal(catalog, None, 3)
+        next_dealt, _ = _deal(catalog, deck, 1)
+        assert next_dealt[0] != dealt[-1]
+
+
+def test_photos_added_mid_deck_are_appended_to_it():
+    catalog = _catalog(5)
+    first, deck = _deal(catalog, None, 2)
+
+    catalog.add({'id': 6}, 2)
+    rest, deck = _deal(catalog, deck, 4)
+
+    assert sorted(first + rest) == list(range(1, 7))
+    assert rest[-1] == 6
+    assert deck.cursor == deck.size == 6
+
+
+def test_a_delete_mid_deck_reshuffles_without_the_photo():
+    catalog = _catalog(5)
+    first, deck = _deal(catalog, None, 2)
+    removed = next(photo_id for photo_id in range(1, 6) if photo_id not in first)
+
+    catalog.remove(removed, 2)
+    dealt, deck = _deal(catalog, deck, 4)
+
+    assert removed not in dealt
+    assert sorted(dealt) == sorted(set(range(1, 6)) - {removed})
+    assert dealt[0] != first[-1]
+    assert deck.catalog_version == 2
+
+
+def test_a_saved_deck_resumes_where_it_stopped():
+    catalog = _catalog(8)
+    first, deck = _deal(catalog, None, 3)
+
+    # The fields stored in photo_decks rebuild an equal deck in a new process
+    restored = PhotoDeck(*tuple(deck))
+    rest, _ = _deal(_catalog(8), restored, 5)
+
+    assert sorted(first + rest) == list(range(1, 9))
@@ -0,0 +1,40 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+import storage.postgres
+from storage.postgres import PostgresStorage
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=2)
+
+
+def _count_loads(monkeypatch) -> list:
+    loads = []
+
+    async def load(storage_key):
+        loads.append(storage_key)
+        return None
+
+    monkeypatch.setattr(storage.postgres, 'load_fsm_record_async', load)
+    return loads
+
+
+async def _get_state_twice(fsm_storage: PostgresStorage):
+    await fsm_storage.get_state(KEY)
+    await fsm_storage.get_state(KEY)
+
+
+def test_consecutive_reads_load_the_record_once(monkeypatch):
+    loads = _count_loads(monkeypatch)
+
+    asyncio.run(_get_state_twice(PostgresStorage(read_ttl=60)))
+
+    assert len(loads) == 1
+
+
+def test_reads_after_the_read_ttl_load_the_record_again(monkeypatch):
+    loads = _count_loads(monkeypatch)
+
+    asyncio.run(_get_state_twice(PostgresStorage(read_ttl=0)))
+
+    assert len(loads) == 2
@@ -0,0 +1,115 @@
+"""
+Webhook transport: Telegram pushes updates to an aiohttp server instead of the
+bot polling getUpdates. The same server, or a standalone one when polling, serves
+the operational endpoints /healthz and /metrics on PORT.
+"""
+
+import asyncio
+import os
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from health import health_handler
+from logging_config import get_logger
+from metrics import metrics_handler
+from middlewares import ConcurrencyLimitMiddleware
+
+logger = get_logger(__name__)
+
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('PORT', '8000'))
+# Parallel connections Telegram opens to deliver updates (1-100)
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+# Updates processed concurrently by this instance
+WEBHOOK_CONCURRENCY = int(os.getenv('WEBHOOK_CONCURRENCY', '100'))
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('true', '1', 'yes')
+
+
+def create_service_app() -> web.Application:
+    """
+    Build the aiohttp application with the operational endpoints.
+    """
+    app = web.Application()
+    app.router.add_get('/healthz', health_handler)
+    if METRICS_ENABLED:
+        app.router.add_get('/metrics', metrics_handler)
+    return app
+
+
+async def start_service_server() -> web.AppRunner:
+    """
+    Serve the operational endpoints on PORT when polling, where no webhook server runs.
+    Returns the runner to clean up on shutdown.
+    """
+    runner = web.AppRunner(create_service_app())
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    logger.info("Service endpoints listening on %s:%s", WEBHOOK_HOST, WEBHOOK_PORT)
+    return runner
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """
+    Build the aiohttp application serving webhook updates on WEBHOOK_PATH.
+    Requests without the matching X-Telegram-Bot-Api-Secret-Token header are rejected.
+    """
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(WEBHOOK_CONCURRENCY))
+
+    app = create_service_app()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        handle_in_background=True
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """
+    Register the webhook with Telegram and serve updates until SIGTERM or SIGINT,
+    so the caller's shutdown cleanup runs on docker stop or a rollout.
+    The webhook is left registered on shutdown so other replicas keep receiving updates.
+    """
+    if not WEBHOOK_URL:
+        raise ValueError("WEBHOOK_URL is required when BOT_MODE=webhook")
+    if not WEBHOOK_SECRET:
+        raise ValueError("WEBHOOK_SECRET is required when BOT_MODE=webhook")
+
+    app = create_webhook_app(bot, dp)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+    await site.start()
+    logger.info("Webhook server listening on %s:%s%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+
+    try:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+            max_connections=WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info("Webhook registered with Telegram")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await stop.wait()
+            logger.info("Received stop signal, shutting down webhook server")
+        finally:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(sig)
+    finally:
+        await runner.cleanup()